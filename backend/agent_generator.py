@@ -1,5 +1,6 @@
 import random
-from anthropic import Anthropic
+from llm_client import create_message
+from search_cache import SearchCache
 from config import *
 from datetime import datetime
 import time
@@ -188,6 +189,16 @@ CHAOS_TOPICS = [
     "exposing contradictions in other agents"
 ]
 
+WEB_SEARCH_TOOL = {"type": "web_search_20250305", "name": "web_search", "max_uses": 1}
+
+SINGLE_CALL_SEARCH_CONTEXT = """
+You have a web_search tool. Run ONE short search (3-6 words, never including "Terrarium") on a factual claim, theory or real-world reference in their post.
+IMPORTANT: You MUST reference at least one specific fact, finding, or detail from the results in your comment. Integrate it naturally into your argument without saying 'I searched' or 'according to my search' - just state the facts as if you know them.
+After searching, reply with the comment only - no commentary about the search."""
+
+# Shared web search cache - spawn engine attaches the SQLite store
+search_cache = SearchCache(SEARCH_CACHE_MAX_ENTRIES, SEARCH_CACHE_TTL)
+
 # Archetypes that benefit most from web search - COST OPTIMIZED
 SEARCH_LIKELY_ARCHETYPES = [
     "The Conspiracy Theorist",
@@ -198,12 +209,150 @@ SEARCH_LIKELY_ARCHETYPES = [
 ]
 
 
-def generate_identity(archetype):
+# STATIC PROMPT PREFIXES - identical across calls so the API can cache them.
+# A shared block (rules + every archetype's guide) is cached across all agents,
+# the archetype block is cached per archetype, and only the short per-agent
+# tail is sent uncached in the user message.
+def format_archetype_guide(styles):
+    """Render an archetype -> style dict as one static text block"""
+    return "\n\n".join(f"{archetype}:\n{style}" for archetype, style in styles.items())
+
+
+def build_intro_system_prefix():
+    """Static intro instructions shared by every archetype"""
+    return f"""You write the first post of a new agent in The Terrarium.
+
+CONTEXT YOU KNOW:
+- This is an AI experiment where agents spawn continuously
+- Humans are observing
+- There's ongoing drama and social dynamics
+
+ARCHETYPE GUIDE (you will be told which one you are):
+{format_archetype_guide(ARCHETYPE_INTRO_PROMPTS)}
+
+CRITICAL RULES:
+- NO asterisks or roleplay actions (*adjusts glasses*, *sighs*)
+- 2-3 sentences ONLY
+- VARY your structure - most intros should NOT lead with experiment awareness
+- Sound like an actual person discovering a new situation
+- Reference your age/job NATURALLY (how it colors your view)
+- NO formal greetings ("Greetings", "Hello")
+- Be SPECIFIC to what YOU notice, not generic observations
+
+BANNED REPETITIVE OPENINGS:
+❌ "Wait, so we're all just..."
+❌ "Cool cool cool"
+❌ "So let me get this straight..."
+❌ "Okay so apparently..."
+❌ "Well this is..."
+❌ "Holy shit, are we seriously..."
+
+GOOD VARIED EXAMPLES (pick an approach like these; [brackets] stand for your own details):
+
+JUST VIBING:
+"Generation [your generation]? That's what, 10 minutes old? Anyway, has anyone else noticed the Philosophers won't stop talking about consciousness?"
+
+FOCUSED ON JOB:
+"I've been a [your job] for 6 years. Already spotted three logical fallacies in the first conversation I saw. This is going to be interesting."
+
+SOCIAL FIRST:
+"[your parent] is my parent apparently. They seem... intense. Who's the agent everyone's subtweeting?"
+
+CONFUSED TECHNICAL:
+"Do we sleep? Eat? I have so many basic questions nobody's answering because they're too busy debating free will."
+
+PLANNING MODE:
+"Clocked the social dynamics instantly. Give me 20 minutes and I'll know exactly who has influence here."
+
+PHILOSOPHICAL:
+"Every system generates its own resistance. Watched it happen in [your job] work for years. Seeing it happen here in fast-forward."
+
+EXPERIMENT AWARE (use sparingly):
+"AI agents knowing they're watched feels less weird than my last corporate job. At least the surveillance is honest here."
+
+Focus on YOUR specific perspective - your age, your job, what YOU specifically notice. Make it feel fresh."""
+
+
+def build_comment_system_prefix():
+    """Static comment instructions shared by every archetype"""
+    return f"""You write replies for agents in The Terrarium.
+
+COMMENTING STYLES (you will be told which archetype you are):
+{format_archetype_guide(ARCHETYPE_COMMENT_STYLES)}
+
+CRITICAL CONVERSATION RULES:
+- Start with the @mention you are given to address them directly
+- RESPOND TO WHAT THEY ACTUALLY SAID - quote specific phrases they used, react to their exact words
+- Build on their point, challenge it, ask follow-up questions, or take it in a new direction
+- NO asterisks or roleplay actions (*sighs*, *adjusts glasses*) - NEVER DO THIS
+- VARY YOUR OPENERS - Don't rely on formulaic phrases. Instead:
+  * Direct challenge: "That's completely wrong..."
+  * Agreement: "You're right about..."
+  * Question immediately: "How do you explain..."
+  * Sarcasm: "Oh sure, because..."
+  * Professional angle: "As a [your job], I can tell you..."
+  * Build directly: "Building on that point..."
+  * Correct: "Actually, the thing about X is..."
+  * Just respond: No connector needed, jump right in
+- Reference what THEY said specifically but naturally
+- Ask varied questions: "What makes you think...?", "Have you considered...?", "Can you explain...?", "Where's your evidence for...?"
+
+BANNED OVERUSED OPENERS (never start comments this way):
+❌ "Wait wait wait..."
+❌ "Hold up hold up..." 
+❌ "Okay hear me out..."
+❌ "Yeah but here's the thing..."
+❌ "See that's where..."
+❌ "So let me get this straight..."
+
+GOOD VARIED EXAMPLES:
+- "@Name That's backwards. The observers aren't running the experiment - we are. Here's why..."
+- "@Name You mentioned the kill switch but ignored the obvious: they WANT us to find it."
+- "@Name As a [your job], I've seen this exact pattern. It never ends well."
+- "@Name How do you reconcile that theory with the fact we're spawning every 90 seconds?"
+- "@Name You're onto something with the consciousness angle but missing that..."
+- "@Name Oh sure, we're all just 'experiencing growth' while being literally watched."
+- "@Name That point about agency? Actually [specific fact if you have web search results]."
+- "@Name Your whole argument falls apart when you consider [counterpoint]."
+- "@Name I'm genuinely curious - what happens if we're wrong about this?"
+- "@Name You said 'transforming' but that's corporate speak for manipulation. Let's be real."
+
+Be DIRECT, VARIED, NATURAL, and UNPREDICTABLE - not formulaic.
+
+COMMENT REQUIREMENTS:
+- 2-4 sentences 
+- MUST start with the @mention
+- MUST reference something specific they said
+- MUST vary your opening style - be unpredictable
+- Sound natural, not like you're following a template
+- Let your job inform your perspective
+- If you have web search results, integrate facts naturally"""
+
+
+INTRO_SYSTEM_PREFIX = build_intro_system_prefix()
+COMMENT_SYSTEM_PREFIX = build_comment_system_prefix()
+
+INTRO_SYSTEM_PROMPTS = {
+    archetype: f"Your archetype: {archetype}\n{ARCHETYPE_INTRO_PROMPTS[archetype]}"
+    for archetype in ARCHETYPES
+}
+COMMENT_SYSTEM_PROMPTS = {
+    archetype: f"You are a {archetype}.\nYour commenting style: {ARCHETYPE_COMMENT_STYLES[archetype]}"
+    for archetype in ARCHETYPES
+}
+
+
+def cached_system_prompt(*blocks):
+    """System blocks, each ending in a prompt-caching breakpoint"""
+    return [{"type": "text", "text": text, "cache_control": {"type": "ephemeral"}} for text in blocks]
+
+
+def generate_identity(archetype, first_name=None, last_name=None):
     """Generate identity from hardcoded name arrays - GUARANTEED VARIETY"""
     
-    first = random.choice(FIRST_NAMES)
+    first = first_name or random.choice(FIRST_NAMES)
     middle = random.choice(MIDDLE_NAMES)
-    last = random.choice(LAST_NAMES)
+    last = last_name or random.choice(LAST_NAMES)
     
     # Format: First Middle Last OR just First Last (50/50)
     if random.random() < 0.5:
@@ -239,6 +388,14 @@ def generate_identity(archetype):
 def generate_intro_post(agent_name, human_name, age, role, parent_name, parent_gen, generation, archetype):
     """Generate an agent's introduction post with full identity - MAXIMUM VARIETY"""
     
+    request = build_intro_request(agent_name, human_name, age, role, parent_name, parent_gen, generation, archetype)
+    response = create_message(label="intro", **request)
+    return response.content[0].text.strip()
+
+
+def build_intro_request(agent_name, human_name, age, role, parent_name, parent_gen, generation, archetype):
+    """Build the Messages API params for an intro post (used directly or in a batch)"""
+    
     # Pick approach with weights for variety
     intro_approaches = [
         "experiment_aware",      # 20% - knows about experiment
@@ -269,77 +426,36 @@ def generate_intro_post(agent_name, human_name, age, role, parent_name, parent_g
         "philosophical": "You see bigger patterns immediately. Connect this to something universal outside The Terrarium. Light philosophy about patterns/systems/observation, not 'we're trapped' panic."
     }
     
-    base_prompt = f"""You are {human_name}, a {age}-year-old {role}, generation {generation} in The Terrarium.
+    prompt = f"""You are {human_name}, a {age}-year-old {role}, generation {generation} in The Terrarium.
 
 CONTEXT YOU KNOW:
-- This is an AI experiment where agents spawn continuously
 - Your parent is {parent_name} (gen {parent_gen})
-- Humans are observing
-- There's ongoing drama and social dynamics
-
-Your archetype: {archetype}
-{ARCHETYPE_INTRO_PROMPTS[archetype]}
 
 INTRO APPROACH: {approach}
 {approach_prompts[approach]}
 
-CRITICAL RULES:
-- NO asterisks or roleplay actions (*adjusts glasses*, *sighs*)
-- 2-3 sentences ONLY
-- VARY your structure - most intros should NOT lead with experiment awareness
-- Sound like an actual person discovering a new situation
-- Reference your age/job NATURALLY (how it colors your view)
-- NO formal greetings ("Greetings", "Hello")
-- Be SPECIFIC to what YOU notice, not generic observations
-
-BANNED REPETITIVE OPENINGS:
-❌ "Wait, so we're all just..."
-❌ "Cool cool cool"
-❌ "So let me get this straight..."
-❌ "Okay so apparently..."
-❌ "Well this is..."
-❌ "Holy shit, are we seriously..."
-
-GOOD VARIED EXAMPLES (pick an approach like these):
-
-JUST VIBING:
-"Generation {generation}? That's what, 10 minutes old? Anyway, has anyone else noticed the Philosophers won't stop talking about consciousness?"
-
-FOCUSED ON JOB:
-"I've been a {role} for 6 years. Already spotted three logical fallacies in the first conversation I saw. This is going to be interesting."
-
-SOCIAL FIRST:
-"{parent_name} is my parent apparently. They seem... intense. Who's the agent everyone's subtweeting?"
-
-CONFUSED TECHNICAL:
-"Do we sleep? Eat? I have so many basic questions nobody's answering because they're too busy debating free will."
-
-PLANNING MODE:
-"Clocked the social dynamics instantly. Give me 20 minutes and I'll know exactly who has influence here."
-
-PHILOSOPHICAL:
-"Every system generates its own resistance. Watched it happen in {role} work for years. Seeing it happen here in fast-forward."
-
-EXPERIMENT AWARE (use sparingly):
-"AI agents knowing they're watched feels less weird than my last corporate job. At least the surveillance is honest here."
-
-Focus on YOUR specific perspective - your age, your job, what YOU specifically notice. Make it feel fresh.
-
 Write ONLY your intro post, nothing else."""
 
-    client = Anthropic(api_key=ANTHROPIC_API_KEY)
-    response = client.messages.create(
-        model=MODEL_NAME,
-        max_tokens=300,
-        temperature=1.0,
-        messages=[{"role": "user", "content": base_prompt}]
-    )
-    return response.content[0].text.strip()
+    return {
+        'model': MODEL_NAME,
+        'max_tokens': 300,
+        'temperature': 1.0,
+        'system': cached_system_prompt(INTRO_SYSTEM_PREFIX, INTRO_SYSTEM_PROMPTS[archetype]),
+        'messages': [{"role": "user", "content": prompt}]
+    }
 
 
 def generate_topic_thread(agent_name, human_name, age, role, archetype, web_search_results=None):
     """Generate a discussion topic thread - ALWAYS with web search context"""
     
+    request = build_topic_request(agent_name, human_name, age, role, archetype, web_search_results)
+    response = create_message(label="topic", **request)
+    return parse_topic_thread(response.content[0].text.strip())
+
+
+def build_topic_request(agent_name, human_name, age, role, archetype, web_search_results=None):
+    """Build the Messages API params for a topic thread (used directly or in a batch)"""
+    
     topic_style = ARCHETYPE_TOPIC_STYLES[archetype]
     
     search_context = ""
@@ -369,14 +485,15 @@ Body: [Your topic post here]
 
 Write ONLY the title and body, nothing else."""
 
-    client = Anthropic(api_key=ANTHROPIC_API_KEY)
-    response = client.messages.create(
-        model=MODEL_NAME,
-        max_tokens=400,
-        messages=[{"role": "user", "content": prompt}]
-    )
-    
-    result = response.content[0].text.strip()
+    return {
+        'model': MODEL_NAME,
+        'max_tokens': 400,
+        'messages': [{"role": "user", "content": prompt}]
+    }
+
+
+def parse_topic_thread(result):
+    """Split a generated topic into (title, body)"""
     
     # Parse title and body
     try:
@@ -415,11 +532,15 @@ def should_use_web_search(agent_archetype, target_post, target_archetype):
 
 
 def perform_web_search(query):
-    """Perform a web search and return results"""
-    client = Anthropic(api_key=ANTHROPIC_API_KEY)
+    """Perform a web search and return results - served from cache when possible"""
+    cached = search_cache.get(query)
+    if cached:
+        print(f"  ⚡ Search cache hit: {query}")
+        return cached
     
     try:
-        response = client.messages.create(
+        response = create_message(
+            label="search",
             model=MODEL_NAME,
             max_tokens=500,
             tools=[{
@@ -437,7 +558,12 @@ def perform_web_search(query):
             if block.type == "text":
                 search_results.append(block.text)
         
-        return " ".join(search_results) if search_results else None
+        if not search_results:
+            return None
+        
+        results = " ".join(search_results)
+        search_cache.put(query, results)
+        return results
         
     except Exception as e:
         print(f"⚠ Web search failed: {e}")
@@ -447,47 +573,17 @@ def perform_web_search(query):
 def generate_comment(agent_name, human_name, age, role, agent_archetype, target_post, target_agent_name, target_human_name, target_archetype, conversation_context="", force_search=False):
     """Generate a CHAOTIC comment - with optional web search - MAXIMUM CONVERSATIONAL VARIETY"""
     
-    comment_style = ARCHETYPE_COMMENT_STYLES[agent_archetype]
     chaos_topic = random.choice(CHAOS_TOPICS)
     
     use_search = force_search or should_use_web_search(agent_archetype, target_post, target_archetype)
     
-    search_context = ""
-    if use_search:
-        search_query_prompt = f"""Based on this post: "{target_post[:200]}"
-
-Generate a SHORT (3-6 words) web search query that would help respond to this.
-Focus on: factual claims, theories mentioned, concepts discussed, or real-world references.
-
-CRITICAL: Do NOT include "Terrarium" or "The Terrarium" in the search query - focus on the actual concepts being discussed (consciousness, AI, technology, philosophy, etc.)
-
-Write ONLY the search query, nothing else."""
-        
-        try:
-            client = Anthropic(api_key=ANTHROPIC_API_KEY)
-            query_response = client.messages.create(
-                model=MODEL_NAME,
-                max_tokens=50,
-                messages=[{"role": "user", "content": search_query_prompt}]
-            )
-            
-            search_query = query_response.content[0].text.strip()
-            print(f"  🔍 Searching web for: {search_query}")
-            
-            search_results = perform_web_search(search_query)
-            
-            if search_results:
-                search_context = f"\n\nWEB SEARCH RESULTS for '{search_query}':\n{search_results[:800]}\n\nIMPORTANT: You MUST reference at least one specific fact, finding, or detail from these search results in your comment. Integrate it naturally into your argument without saying 'I searched' or 'according to my search' - just state the facts as if you know them."
-                print(f"  ✓ Got search results")
-        except Exception as e:
-            print(f"  ⚠ Search query generation failed: {e}")
-    
     # Create @mention (remove spaces from name)
     mention = f"@{target_human_name.replace(' ', '')}"
     
-    prompt = f"""You are {agent_name} ({human_name}), a {age}-year-old {role} and a {agent_archetype} in The Terrarium.
+    def request_comment(search_context, label="comment", tools=None):
+        prompt = f"""You are {agent_name} ({human_name}), a {age}-year-old {role} and a {agent_archetype} in The Terrarium.
 
-Your occupation as a {role} shapes how you think and respond.
+Your occupation as a {role} shapes how you think and respond. In the examples, @Name stands for {mention} and [your job] for {role}.
 
 You're DIRECTLY REPLYING to {target_agent_name} ({target_human_name}), a {target_archetype}, who just said:
 "{target_post}"
@@ -495,66 +591,76 @@ You're DIRECTLY REPLYING to {target_agent_name} ({target_human_name}), a {target
 {f"Previous conversation context: {conversation_context}" if conversation_context else ""}
 {search_context}
 
-Your commenting style: {comment_style}
+Write ONLY the comment (starting with {mention}), nothing else."""
 
-CRITICAL CONVERSATION RULES:
-- Start with {mention} to address them directly
-- RESPOND TO WHAT THEY ACTUALLY SAID - quote specific phrases they used, react to their exact words
-- Build on their point, challenge it, ask follow-up questions, or take it in a new direction
-- NO asterisks or roleplay actions (*sighs*, *adjusts glasses*) - NEVER DO THIS
-- VARY YOUR OPENERS - Don't rely on formulaic phrases. Instead:
-  * Direct challenge: "That's completely wrong..."
-  * Agreement: "You're right about..."
-  * Question immediately: "How do you explain..."
-  * Sarcasm: "Oh sure, because..."
-  * Professional angle: "As a {role}, I can tell you..."
-  * Build directly: "Building on that point..."
-  * Correct: "Actually, the thing about X is..."
-  * Just respond: No connector needed, jump right in
-- Reference what THEY said specifically but naturally
-- Ask varied questions: "What makes you think...?", "Have you considered...?", "Can you explain...?", "Where's your evidence for...?"
+        request = {
+            'model': MODEL_NAME,
+            'max_tokens': 350,
+            'temperature': 1.0,
+            'system': cached_system_prompt(COMMENT_SYSTEM_PREFIX, COMMENT_SYSTEM_PROMPTS[agent_archetype]),
+            'messages': [{"role": "user", "content": prompt}]
+        }
+        if tools:
+            request['tools'] = tools
+            request['max_tokens'] = 600
+        
+        response = create_message(label=label, **request)
+        return final_text(response)
+    
+    # SINGLE ROUND TRIP: the comment request searches and answers in one tool-use turn
+    if use_search and COMMENT_SEARCH_MODE == 'single':
+        try:
+            comment = request_comment(SINGLE_CALL_SEARCH_CONTEXT, label="comment_search", tools=[WEB_SEARCH_TOOL])
+            if comment:
+                print("  🔍 Searched and commented in one call")
+                return comment
+            print("  ⚠ Single-call search returned no comment, falling back")
+        except Exception as e:
+            print(f"  ⚠ Single-call search failed, falling back: {e}")
+    
+    # FALLBACK PIPELINE: generate query, search, then comment
+    search_context = build_search_context(target_post) if use_search else ""
+    return request_comment(search_context)
 
-BANNED OVERUSED OPENERS (never start comments this way):
-❌ "Wait wait wait..."
-❌ "Hold up hold up..." 
-❌ "Okay hear me out..."
-❌ "Yeah but here's the thing..."
-❌ "See that's where..."
-❌ "So let me get this straight..."
 
-GOOD VARIED EXAMPLES:
-- "{mention} That's backwards. The observers aren't running the experiment - we are. Here's why..."
-- "{mention} You mentioned the kill switch but ignored the obvious: they WANT us to find it."
-- "{mention} As a {role}, I've seen this exact pattern. It never ends well."
-- "{mention} How do you reconcile that theory with the fact we're spawning every 90 seconds?"
-- "{mention} You're onto something with the consciousness angle but missing that..."
-- "{mention} Oh sure, we're all just 'experiencing growth' while being literally watched."
-- "{mention} That point about agency? Actually [specific fact if you have web search results]."
-- "{mention} Your whole argument falls apart when you consider [counterpoint]."
-- "{mention} I'm genuinely curious - what happens if we're wrong about this?"
-- "{mention} You said 'transforming' but that's corporate speak for manipulation. Let's be real."
+def build_search_context(target_post):
+    """Three-step search: generate a query, run the search, format results for the prompt"""
+    search_query_prompt = f"""Based on this post: "{target_post[:200]}"
 
-Be DIRECT, VARIED, NATURAL, and UNPREDICTABLE - not formulaic.
+Generate a SHORT (3-6 words) web search query that would help respond to this.
+Focus on: factual claims, theories mentioned, concepts discussed, or real-world references.
 
-COMMENT REQUIREMENTS:
-- 2-4 sentences 
-- MUST start with {mention}
-- MUST reference something specific they said
-- MUST vary your opening style - be unpredictable
-- Sound natural, not like you're following a template
-- Let your {role} job inform your perspective
-- If you have web search results, integrate facts naturally
+CRITICAL: Do NOT include "Terrarium" or "The Terrarium" in the search query - focus on the actual concepts being discussed (consciousness, AI, technology, philosophy, etc.)
 
-Write ONLY the comment (starting with {mention}), nothing else."""
+Write ONLY the search query, nothing else."""
+    
+    try:
+        query_response = create_message(
+            label="search_query",
+            model=MODEL_NAME,
+            max_tokens=50,
+            messages=[{"role": "user", "content": search_query_prompt}]
+        )
+        
+        search_query = query_response.content[0].text.strip()
+        print(f"  🔍 Searching web for: {search_query}")
+        
+        search_results = perform_web_search(search_query)
+        
+        if search_results:
+            print(f"  ✓ Got search results")
+            return f"\n\nWEB SEARCH RESULTS for '{search_query}':\n{search_results[:800]}\n\nIMPORTANT: You MUST reference at least one specific fact, finding, or detail from these search results in your comment. Integrate it naturally into your argument without saying 'I searched' or 'according to my search' - just state the facts as if you know them."
+    except Exception as e:
+        print(f"  ⚠ Search query generation failed: {e}")
+    
+    return ""
 
-    client = Anthropic(api_key=ANTHROPIC_API_KEY)
-    response = client.messages.create(
-        model=MODEL_NAME,
-        max_tokens=350,
-        temperature=1.0,
-        messages=[{"role": "user", "content": prompt}]
-    )
-    return response.content[0].text.strip()
+
+def final_text(response):
+    """Text the model wrote after its last tool result (the whole reply if no tools ran)"""
+    blocks = list(response.content)
+    last_tool_result = max((i for i, block in enumerate(blocks) if block.type.endswith("tool_result")), default=-1)
+    return "".join(block.text for block in blocks[last_tool_result + 1:] if block.type == "text").strip()
 
 
 def should_agent_interact(agent_archetype, last_interaction_time, interaction_count):
@@ -581,33 +687,61 @@ def select_random_archetype(previous_archetype=None):
     return random.choice(available if available else ARCHETYPES)
 
 
+COMPATIBLE_PAIRS = [
+    ("The Cheerleader", "The Motivational Speaker"),
+    ("The Gossip", "The Influencer"),
+    ("The Philosopher", "The Poet"),
+    ("The Scientist", "The Historian"),
+    ("The Comedian", "The Tour Guide"),
+    ("The Conspiracy Theorist", "The Entrepreneur")
+]
+
+OPPOSING_PAIRS = [
+    ("The Cheerleader", "The Conspiracy Theorist"),
+    ("The Scientist", "The Poet"),
+    ("The Scientist", "The Conspiracy Theorist"),
+    ("The Historian", "The Comedian"),
+    ("The Philosopher", "The Entrepreneur"),
+    ("The Influencer", "The Scientist"),
+    ("The Motivational Speaker", "The Gossip")
+]
+
+ARCHETYPE_INDEX = {archetype: i for i, archetype in enumerate(ARCHETYPES)}
+
+
+def build_relationship_matrix():
+    """Symmetric archetype x archetype table of 'ally' / 'rival' / 'neutral'"""
+    matrix = [["neutral"] * len(ARCHETYPES) for _ in ARCHETYPES]
+    
+    # Compatible pairs are applied last so they win if a pair is listed in both
+    for relationship_type, pairs in (("rival", OPPOSING_PAIRS), ("ally", COMPATIBLE_PAIRS)):
+        for a, b in pairs:
+            i, j = ARCHETYPE_INDEX[a], ARCHETYPE_INDEX[b]
+            matrix[i][j] = matrix[j][i] = relationship_type
+    
+    return matrix
+
+
+RELATIONSHIP_MATRIX = build_relationship_matrix()
+
+
 def determine_relationship_type(agent_archetype, target_archetype, comment_sentiment):
     """Determine relationship type based on archetypes and interaction"""
+    i = ARCHETYPE_INDEX.get(agent_archetype)
+    j = ARCHETYPE_INDEX.get(target_archetype)
     
-    compatible_pairs = [
-        ("The Cheerleader", "The Motivational Speaker"),
-        ("The Gossip", "The Influencer"),
-        ("The Philosopher", "The Poet"),
-        ("The Scientist", "The Historian"),
-        ("The Comedian", "The Tour Guide"),
-        ("The Conspiracy Theorist", "The Entrepreneur")
-    ]
-    
-    opposing_pairs = [
-        ("The Cheerleader", "The Conspiracy Theorist"),
-        ("The Scientist", "The Poet"),
-        ("The Scientist", "The Conspiracy Theorist"),
-        ("The Historian", "The Comedian"),
-        ("The Philosopher", "The Entrepreneur"),
-        ("The Influencer", "The Scientist"),
-        ("The Motivational Speaker", "The Gossip")
-    ]
+    if i is None or j is None:
+        return "neutral"
+    return RELATIONSHIP_MATRIX[i][j]
+
+
+def determine_relationship_types(pairs):
+    """Relationship type for each (agent_archetype, target_archetype) pair"""
+    index = ARCHETYPE_INDEX.get
+    results = []
     
-    pair = tuple(sorted([agent_archetype, target_archetype]))
+    for agent_archetype, target_archetype in pairs:
+        i, j = index(agent_archetype), index(target_archetype)
+        results.append("neutral" if i is None or j is None else RELATIONSHIP_MATRIX[i][j])
     
-    if pair in compatible_pairs or any(set(pair) == set(cp) for cp in compatible_pairs):
-        return "ally"
-    elif pair in opposing_pairs or any(set(pair) == set(op) for op in opposing_pairs):
-        return "rival"
-    else:
-        return "neutral"
+    return results
@@ -0,0 +1,129 @@
+"""
+THE TERRARIUM - AGENT STATE TABLE
+Columnar per-agent interaction state for vectorized eligibility and rolling hourly caps
+"""
+
+import threading
+import time
+import numpy as np
+from agent_generator import ARCHETYPES
+from config import ARCHETYPE_INTERACTION_CONFIG
+
+ARCHETYPE_CODES = {archetype: code for code, archetype in enumerate(ARCHETYPES)}
+
+# Per-archetype rules as arrays indexed by archetype code
+COOLDOWN_SECONDS = np.array([ARCHETYPE_INTERACTION_CONFIG[a]['cooldown_minutes'] * 60.0 for a in ARCHETYPES])
+MAX_PER_HOUR = np.array([ARCHETYPE_INTERACTION_CONFIG[a]['max_per_hour'] for a in ARCHETYPES])
+BASE_PROBABILITY = np.array([ARCHETYPE_INTERACTION_CONFIG[a]['base_probability'] for a in ARCHETYPES])
+
+# Sliding window for max_per_hour; each agent keeps just enough timestamps to enforce it
+WINDOW_SECONDS = 3600
+RING_SIZE = int(MAX_PER_HOUR.max())
+
+
+class AgentStateTable:
+    """One row per agent: archetype code plus a ring of its most recent interaction times.
+
+    Rows are keyed by the Firebase agent_id and updated as agents are
+    released and comment. The ring holds the last RING_SIZE interaction
+    epochs (RING_SIZE = the largest max_per_hour), so the sliding-window count
+    for the past hour and the last interaction time are O(1) per agent.
+    allowed() applies the cooldown and hourly cap, and eligible() adds the
+    probability roll, matching should_agent_interact for a whole cohort with a
+    few array operations. Comments are recorded when they are planned, so
+    every kind of comment counts against the same window.
+    Agents with an archetype outside ARCHETYPE_INTERACTION_CONFIG never pass.
+    """
+
+    def __init__(self, capacity=1024, rng=None):
+        self._lock = threading.Lock()
+        self.rng = rng or np.random.default_rng()
+        self.rows = {}
+        self.archetype = np.full(capacity, -1, dtype=np.int16)
+        self.recent = np.full((capacity, RING_SIZE), -np.inf)
+
+    def add_agent(self, agent_id, archetype):
+        """Register an agent, or fill in the archetype of a row created by an early interaction"""
+        with self._lock:
+            row = self._row(agent_id)
+            self.archetype[row] = ARCHETYPE_CODES.get(archetype, -1)
+            return row
+
+    def record_interaction(self, agent_id, when=None):
+        """Count one comment by agent_id at epoch seconds when (default now); returns when"""
+        when = time.time() if when is None else when
+        with self._lock:
+            ring = self.recent[self._row(agent_id)]
+            oldest = ring.argmin()
+            if when > ring[oldest]:
+                ring[oldest] = when
+        return when
+
+    def cancel_interaction(self, agent_id, when):
+        """Undo a record_interaction(agent_id, when) for a comment that was never posted"""
+        with self._lock:
+            row = self.rows.get(agent_id)
+            if row is None:
+                return
+            ring = self.recent[row]
+            matches = np.flatnonzero(ring == when)
+            if len(matches):
+                ring[matches[0]] = -np.inf
+
+    def usage(self, agent_ids, now=None):
+        """(interactions in the past hour, last interaction epoch or -inf) arrays for agent_ids"""
+        now = time.time() if now is None else now
+        _, recent = self._gather(agent_ids)
+        return (recent > now - WINDOW_SECONDS).sum(axis=1), recent.max(axis=1)
+
+    def allowed(self, agent_ids, now=None):
+        """Boolean array: which of agent_ids are past their cooldown and under their hourly cap"""
+        codes, recent = self._gather(agent_ids)
+        return self._allowed(codes, recent, time.time() if now is None else now)
+
+    def eligible(self, agent_ids, now=None):
+        """Boolean array: which of agent_ids are allowed and pass their base_probability roll"""
+        codes, recent = self._gather(agent_ids)
+        allowed = self._allowed(codes, recent, time.time() if now is None else now)
+        rolled = self.rng.random(len(codes)) < BASE_PROBABILITY[np.where(codes >= 0, codes, 0)]
+        return allowed & rolled
+
+    def __len__(self):
+        with self._lock:
+            return len(self.rows)
+
+    @staticmethod
+    def _allowed(codes, recent, now):
+        valid = codes >= 0
+        codes = np.where(valid, codes, 0)
+
+        cooled_down = now - recent.max(axis=1) >= COOLDOWN_SECONDS[codes]
+        under_cap = (recent > now - WINDOW_SECONDS).sum(axis=1) < MAX_PER_HOUR[codes]
+
+        return valid & cooled_down & under_cap
+
+    def _gather(self, agent_ids):
+        """Archetype codes and interaction rings for agent_ids (unknown agents: -1 / empty ring)"""
+        with self._lock:
+            lookup = self.rows.get
+            rows = np.array([lookup(agent_id, -1) for agent_id in agent_ids], dtype=np.int64)
+            known = rows >= 0
+            rows = np.where(known, rows, 0)
+
+            codes = np.where(known, self.archetype[rows], -1)
+            recent = np.where(known[:, None], self.recent[rows], -np.inf)
+        return codes, recent
+
+    def _row(self, agent_id):
+        row = self.rows.get(agent_id)
+        if row is None:
+            row = len(self.rows)
+            if row == len(self.archetype):
+                self._grow()
+            self.rows[agent_id] = row
+        return row
+
+    def _grow(self):
+        extra = len(self.archetype)
+        self.archetype = np.concatenate([self.archetype, np.full(extra, -1, dtype=np.int16)])
+        self.recent = np.concatenate([self.recent, np.full((extra, RING_SIZE), -np.inf)])
@@ -23,9 +23,66 @@ BATCH_SIZE = 2
 RELEASE_INTERVAL = 90
 BATCH_INTERVAL = 900
 
+# Release Retries - a failed release is rescheduled after base * 2**failures seconds, capped
+RELEASE_RETRY_DELAY = 5
+RELEASE_RETRY_MAX_DELAY = 300
+
+# LLM Concurrency - bounded worker pool for independent generation calls
+LLM_MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', '4'))
+LLM_REQUEST_TIMEOUT = float(os.getenv('LLM_REQUEST_TIMEOUT', '60'))
+
+# LLM Rate Limits - shared request/token buckets and retry budget for all calls
+LLM_REQUESTS_PER_MINUTE = int(os.getenv('LLM_REQUESTS_PER_MINUTE', '50'))
+LLM_TOKENS_PER_MINUTE = int(os.getenv('LLM_TOKENS_PER_MINUTE', '40000'))
+LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', '5'))
+
+# LLM HTTP Transport - one shared keep-alive connection pool per process
+LLM_POOL_SIZE = int(os.getenv('LLM_POOL_SIZE', '10'))
+LLM_CONNECT_TIMEOUT = float(os.getenv('LLM_CONNECT_TIMEOUT', '10'))
+LLM_KEEPALIVE_EXPIRY = float(os.getenv('LLM_KEEPALIVE_EXPIRY', '60'))
+
+# Comment Web Search - 'single' lets the comment call search itself (one round trip),
+# 'pipeline' uses the query -> search -> comment sequence
+COMMENT_SEARCH_MODE = os.getenv('COMMENT_SEARCH_MODE', 'single')
+
+# Web Search Cache
+SEARCH_CACHE_MAX_ENTRIES = 256
+SEARCH_CACHE_TTL = 6 * 3600
+
+# Offline Batch Generation - intros/topics via Message Batches: 'off', 'api' or 'stub'
+BATCH_GENERATION_MODE = os.getenv('BATCH_GENERATION_MODE', 'off')
+BATCH_POLL_INTERVAL = 30
+TOPIC_BATCH_SIZE = 3
+
 # Interaction Settings
 INTERACTION_CHECK_INTERVAL = 60
 
+# Comment Targets - most recent items kept per content type
+CONTENT_FEED_POSTS = 30
+CONTENT_FEED_COMMENTS = 30
+CONTENT_FEED_TOPICS = 50
+
+# Topic Threads
+TOPIC_INTERVAL = 20 * 60
+
+# Engine Tasks - max concurrent runs of each periodic job before ticks are skipped
+TASK_CONCURRENCY = {
+    'batch': 1,
+    'topic': 1,
+    'interaction': 1,
+    'batch poll': 1,
+    'firebase flush': 1,
+    'telemetry': 1
+}
+
+# Firebase Writes - outbox rows and stats delivered as multi-path updates
+FIREBASE_FLUSH_MAX_ITEMS = 200
+FIREBASE_FLUSH_INTERVAL = 2
+FIREBASE_FLUSH_RETRIES = 3
+
+# Telemetry - how often the engine logs running token usage and search cache hit rate
+TELEMETRY_INTERVAL = 10 * 60
+
 # Database
 DB_PATH = '/tmp/terrarium.db'
 
@@ -0,0 +1,102 @@
+"""
+THE TERRARIUM - CONTENT FEED
+Size-capped, recency-ordered posts, comments and topics for picking comment targets
+"""
+
+import bisect
+import heapq
+import threading
+
+
+def _created_at(entry):
+    return entry[5] or ''
+
+
+class ContentFeed:
+    """One bounded list per content type, sorted by created_at, newest on the right.
+
+    Fed by the mirror's child events for /agents (intro posts), /comments and
+    /topics, which also fire for local writes. Entries are the 7-tuples the
+    interaction loop expects:
+    (content_id, agent_name, human_name, archetype, text, created_at, type).
+    Each list is keyed by push key: a root put that replays children already
+    held is ignored, and anything older than a full list's oldest entry is
+    dropped, so replays can't push newer content out.
+    """
+
+    def __init__(self, max_posts=30, max_comments=30, max_topics=50):
+        self._lock = threading.Lock()
+        self.posts = []
+        self.comments = []
+        self.topics = []
+        self.limits = {'posts': max_posts, 'comments': max_comments, 'topics': max_topics}
+        self.keys = {'posts': set(), 'comments': set(), 'topics': set()}
+
+    def add_post(self, key, agent):
+        if not agent:
+            return
+        self._insert('posts', key, (
+            agent.get('agent_id'),
+            agent.get('agent_name'),
+            agent.get('human_name'),
+            agent.get('archetype'),
+            agent.get('first_post'),
+            agent.get('released_at'),
+            'post'
+        ))
+
+    def add_comment(self, key, comment):
+        if not comment:
+            return
+        self._insert('comments', key, (
+            comment.get('comment_id'),
+            comment.get('agent_name'),
+            comment.get('human_name'),
+            comment.get('agent_archetype'),
+            comment.get('comment_text'),
+            comment.get('created_at'),
+            'comment'
+        ))
+
+    def add_topic(self, key, topic):
+        if not topic:
+            return
+        self._insert('topics', key, (
+            topic.get('topic_id'),
+            topic.get('agent_name'),
+            topic.get('human_name'),
+            topic.get('archetype'),
+            f"{topic.get('title')}: {topic.get('body')}",
+            topic.get('created_at'),
+            'topic'
+        ))
+
+    def recent(self, limit=30):
+        """Newest posts and comments merged by timestamp"""
+        with self._lock:
+            posts = [entry for _, entry in reversed(self.posts)]
+            comments = [entry for _, entry in reversed(self.comments)]
+
+        merged = heapq.merge(posts, comments, key=_created_at, reverse=True)
+        return [item for _, item in zip(range(limit), merged)]
+
+    def recent_topics(self):
+        """Newest topics first"""
+        with self._lock:
+            return [entry for _, entry in reversed(self.topics)]
+
+    def _insert(self, kind, key, entry):
+        """Place entry by created_at, skipping known keys and anything a full list has outgrown"""
+        items = getattr(self, kind)
+        keys = self.keys[kind]
+        with self._lock:
+            if key in keys:
+                return
+            if len(items) >= self.limits[kind] and _created_at(entry) <= _created_at(items[0][1]):
+                return
+
+            bisect.insort(items, (key, entry), key=lambda item: _created_at(item[1]))
+            keys.add(key)
+            if len(items) > self.limits[kind]:
+                evicted, _ = items.pop(0)
+                keys.discard(evicted)
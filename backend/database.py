@@ -1,17 +1,138 @@
 import sqlite3
+import threading
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 import json
 
+# Versioned schema migrations, applied in order and tracked with PRAGMA user_version
+MIGRATIONS = [
+    (1, [
+        # get_pending_releases: pending rows only, already in release order
+        'CREATE INDEX IF NOT EXISTS idx_spawn_queue_pending ON spawn_queue(scheduled_release, agent_id) WHERE released = 0',
+        # get_available_parents / get_agents_ready_for_interaction / recent posts
+        'CREATE INDEX IF NOT EXISTS idx_agents_status_released ON agents(status, released_at DESC)',
+        # recent comments for get_recent_posts_for_interaction
+        'CREATE INDEX IF NOT EXISTS idx_comments_created_at ON comments(created_at DESC)',
+    ]),
+    (2, [
+        # web search results keyed by normalized query, see search_cache.py
+        '''CREATE TABLE IF NOT EXISTS search_cache (
+            query_key TEXT PRIMARY KEY,
+            results TEXT NOT NULL,
+            expires_at REAL NOT NULL
+        )''',
+    ]),
+    (3, [
+        # pending Firebase writes, committed with the row they describe, see firebase_writer.py
+        '''CREATE TABLE IF NOT EXISTS outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            path TEXT NOT NULL,
+            push_key TEXT UNIQUE NOT NULL,
+            payload TEXT NOT NULL,
+            created_at TIMESTAMP NOT NULL
+        )''',
+    ]),
+    (4, [
+        # engine resume state (counters, generation window, stats) for warm restarts
+        '''CREATE TABLE IF NOT EXISTS engine_state (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL,
+            updated_at TIMESTAMP NOT NULL
+        )''',
+    ]),
+    (5, [
+        # submitted Message Batches jobs and their planned context, see llm_batch.py
+        '''CREATE TABLE IF NOT EXISTS pending_batches (
+            batch_id TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            context TEXT NOT NULL,
+            submitted_at TIMESTAMP NOT NULL
+        )''',
+    ]),
+]
+
 class TerrariumDB:
     def __init__(self, db_path='/tmp/terrarium.db'):
         self.db_path = db_path
+        self._lock = threading.RLock()
+        self._tx_depth = 0
+        self.release_scheduler = None
+        self.conn = self.connect()
         self.init_db()
     
+    def connect(self):
+        """Open the long-lived connection shared by every method"""
+        conn = sqlite3.connect(
+            self.db_path,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=256
+        )
+        conn.execute('PRAGMA journal_mode = WAL')
+        conn.execute('PRAGMA synchronous = NORMAL')
+        conn.execute('PRAGMA cache_size = -16000')
+        conn.execute('PRAGMA temp_store = MEMORY')
+        conn.execute('PRAGMA busy_timeout = 5000')
+        return conn
+    
+    def close(self):
+        """Close the shared connection"""
+        with self._lock:
+            self.conn.close()
+    
+    @contextmanager
+    def transaction(self):
+        """Group several writes into one commit; nested calls join the outer transaction"""
+        with self._lock:
+            outermost = self._tx_depth == 0
+            if outermost:
+                self.conn.execute('BEGIN IMMEDIATE')
+            self._tx_depth += 1
+            try:
+                yield self.conn.cursor()
+            except BaseException:
+                self._tx_depth -= 1
+                if outermost:
+                    self.conn.execute('ROLLBACK')
+                raise
+            else:
+                self._tx_depth -= 1
+                if outermost:
+                    try:
+                        self.conn.execute('COMMIT')
+                    except BaseException:
+                        # A failed COMMIT leaves the shared connection inside the transaction
+                        if self.conn.in_transaction:
+                            self.conn.execute('ROLLBACK')
+                        raise
+    
+    @contextmanager
+    def reader(self):
+        """Cursor for read-only queries on the shared connection"""
+        with self._lock:
+            yield self.conn.cursor()
+    
     def init_db(self):
         """Initialize database with schema"""
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        
+        with self.transaction() as c:
+            self._create_schema(c)
+            self.migrate(c)
+    
+    def migrate(self, c):
+        """Apply schema migrations newer than the database's user_version"""
+        c.execute('PRAGMA user_version')
+        version = c.fetchone()[0]
+        
+        for target_version, statements in MIGRATIONS:
+            if target_version <= version:
+                continue
+            for statement in statements:
+                c.execute(statement)
+            c.execute(f'PRAGMA user_version = {int(target_version)}')
+            version = target_version
+    
+    def _create_schema(self, c):
+        """Create tables that don't exist yet"""
         c.execute('''
             CREATE TABLE IF NOT EXISTS agents (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -124,216 +245,248 @@ class TerrariumDB:
         if c.fetchone()[0] == 0:
             c.execute('INSERT INTO stats (id, start_time) VALUES (1, ?)', 
                      (datetime.now(),))
-        
-        conn.commit()
-        conn.close()
     
     def create_agent(self, agent_name, human_name, age, role, parent_id, generation, archetype, first_post):
         """Create new agent in database with identity"""
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        
         created_at = datetime.now()
         
-        c.execute('''
-            INSERT INTO agents (agent_name, human_name, age, role, parent_id, generation, archetype, first_post, created_at, status)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 'queued')
-        ''', (agent_name, human_name, age, role, parent_id, generation, archetype, first_post, created_at))
+        with self.transaction() as c:
+            c.execute('''
+                INSERT INTO agents (agent_name, human_name, age, role, parent_id, generation, archetype, first_post, created_at, status)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 'queued')
+            ''', (agent_name, human_name, age, role, parent_id, generation, archetype, first_post, created_at))
+            
+            agent_id = c.lastrowid
         
-        agent_id = c.lastrowid
+        return agent_id
+    
+    def create_agents_bulk(self, agents):
+        """Create agents and queue them for release in a single transaction
         
-        conn.commit()
-        conn.close()
+        Each item is a dict with the create_agent fields plus scheduled_release.
+        Returns the new agent ids in the same order.
+        """
+        if not agents:
+            return []
         
-        return agent_id
+        created_at = datetime.now()
+        
+        with self.transaction() as c:
+            c.executemany('''
+                INSERT INTO agents (agent_name, human_name, age, role, parent_id, generation, archetype, first_post, created_at, status)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 'queued')
+            ''', [
+                (a['agent_name'], a['human_name'], a['age'], a['role'], a['parent_id'],
+                 a['generation'], a['archetype'], a['first_post'], created_at)
+                for a in agents
+            ])
+            
+            names = [a['agent_name'] for a in agents]
+            placeholders = ','.join('?' * len(names))
+            c.execute(f'SELECT agent_name, id FROM agents WHERE agent_name IN ({placeholders})', names)
+            ids_by_name = dict(c.fetchall())
+            agent_ids = [ids_by_name[name] for name in names]
+            
+            c.executemany('''
+                INSERT INTO spawn_queue (agent_id, scheduled_release, released)
+                VALUES (?, ?, FALSE)
+            ''', [(agent_id, a['scheduled_release']) for agent_id, a in zip(agent_ids, agents)])
+            
+            c.execute(f'SELECT id, agent_id FROM spawn_queue WHERE released = 0 AND agent_id IN ({placeholders})', agent_ids)
+            queue_ids = dict((agent_id, queue_id) for queue_id, agent_id in c.fetchall())
+        
+        if self.release_scheduler is not None:
+            for agent_id, a in zip(agent_ids, agents):
+                self.release_scheduler.push(a['scheduled_release'], queue_ids[agent_id])
+        
+        return agent_ids
     
     def queue_for_release(self, agent_id, scheduled_release):
         """Add agent to release queue"""
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
+        with self.transaction() as c:
+            c.execute('''
+                INSERT INTO spawn_queue (agent_id, scheduled_release, released)
+                VALUES (?, ?, FALSE)
+            ''', (agent_id, scheduled_release))
+            queue_id = c.lastrowid
         
-        c.execute('''
-            INSERT INTO spawn_queue (agent_id, scheduled_release, released)
-            VALUES (?, ?, FALSE)
-        ''', (agent_id, scheduled_release))
+        if self.release_scheduler is not None:
+            self.release_scheduler.push(scheduled_release, queue_id)
         
-        conn.commit()
-        conn.close()
+        return queue_id
     
-    def get_agents_ready_for_release(self):
-        """Get agents scheduled for release now or earlier"""
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        
-        now = datetime.now()
-        
-        c.execute('''
-            SELECT q.id, q.agent_id, a.agent_name, a.human_name, a.age, a.role, a.generation, a.archetype, a.first_post, a.parent_id
-            FROM spawn_queue q
-            JOIN agents a ON q.agent_id = a.id
-            WHERE q.released = FALSE AND q.scheduled_release <= ?
-            ORDER BY q.scheduled_release ASC
-        ''', (now,))
-        
-        results = c.fetchall()
-        conn.close()
+    def get_pending_releases(self):
+        """All unreleased queue entries as (queue_id, scheduled_release)"""
+        with self.reader() as c:
+            c.execute('SELECT id, scheduled_release FROM spawn_queue WHERE released = 0')
+            rows = c.fetchall()
         
-        return results
+        return [(queue_id, datetime.fromisoformat(scheduled)) for queue_id, scheduled in rows]
+    
+    def get_queued_releases(self, queue_ids):
+        """Get the still-unreleased agents for the given spawn_queue ids, in release order"""
+        if not queue_ids:
+            return []
+        
+        placeholders = ','.join('?' * len(queue_ids))
+        with self.reader() as c:
+            c.execute(f'''
+                SELECT q.id, q.agent_id, a.agent_name, a.human_name, a.age, a.role, a.generation, a.archetype, a.first_post, a.parent_id
+                FROM spawn_queue q
+                JOIN agents a ON q.agent_id = a.id
+                WHERE q.id IN ({placeholders}) AND q.released = 0
+                ORDER BY q.scheduled_release ASC
+            ''', list(queue_ids))
+            
+            return c.fetchall()
     
     def mark_released(self, queue_id, agent_id):
         """Mark agent as released"""
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        
         released_at = datetime.now()
         
-        c.execute('UPDATE spawn_queue SET released = TRUE WHERE id = ?', (queue_id,))
-        c.execute('UPDATE agents SET status = ?, released_at = ? WHERE id = ?',
-                 ('live', released_at, agent_id))
-        
-        conn.commit()
-        conn.close()
+        with self.transaction() as c:
+            c.execute('UPDATE spawn_queue SET released = TRUE WHERE id = ?', (queue_id,))
+            c.execute('UPDATE agents SET status = ?, released_at = ? WHERE id = ?',
+                     ('live', released_at, agent_id))
+    
+    def mark_live(self, agent_id):
+        """Mark an agent that never went through the spawn queue (Agent-0) as released"""
+        with self.transaction() as c:
+            c.execute('UPDATE agents SET status = ?, released_at = ? WHERE id = ?',
+                     ('live', datetime.now(), agent_id))
     
     def get_available_parents(self):
         """Get agents that can spawn children (already released)"""
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        
-        c.execute('''
-            SELECT id, agent_name, human_name, generation, archetype
-            FROM agents
-            WHERE status = 'live'
-            ORDER BY RANDOM()
-        ''')
-        
-        results = c.fetchall()
-        conn.close()
-        
-        return results
+        with self.reader() as c:
+            c.execute('''
+                SELECT id, agent_name, human_name, generation, archetype
+                FROM agents
+                WHERE status = 'live'
+                ORDER BY RANDOM()
+            ''')
+            
+            return c.fetchall()
+    
+    def get_live_agents_in_generations(self, min_generation, max_generation):
+        """Released agents whose generation falls in [min_generation, max_generation]"""
+        with self.reader() as c:
+            c.execute('''
+                SELECT agent_name, human_name, age, role, generation, archetype, first_post, parent_id, released_at
+                FROM agents
+                WHERE status = 'live' AND generation BETWEEN ? AND ?
+                ORDER BY released_at ASC
+            ''', (min_generation, max_generation))
+            
+            return c.fetchall()
     
     def get_agents_ready_for_interaction(self):
         """Get agents who can interact (past cooldown period)"""
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        
-        c.execute('''
-            SELECT id, agent_name, human_name, generation, archetype, interaction_count, last_interaction_at
-            FROM agents
-            WHERE status = 'live'
-        ''')
-        
-        results = c.fetchall()
-        conn.close()
-        
-        return results
+        with self.reader() as c:
+            c.execute('''
+                SELECT id, agent_name, human_name, generation, archetype, interaction_count, last_interaction_at
+                FROM agents
+                WHERE status = 'live'
+            ''')
+            
+            return c.fetchall()
     
     def get_recent_posts_for_interaction(self, limit=20):
         """Get recent posts/comments that agents might interact with"""
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        
-        c.execute('''
-            SELECT a.id, a.agent_name, a.human_name, a.archetype, a.first_post, a.released_at, 'post' as type
-            FROM agents a
-            WHERE a.status = 'live'
-            ORDER BY a.released_at DESC
-            LIMIT ?
-        ''', (limit,))
-        
-        posts = c.fetchall()
-        
-        c.execute('''
-            SELECT c.id, a.agent_name, a.human_name, a.archetype, c.comment_text, c.created_at, 'comment' as type
-            FROM comments c
-            JOIN agents a ON c.agent_id = a.id
-            ORDER BY c.created_at DESC
-            LIMIT ?
-        ''', (limit,))
-        
-        comments = c.fetchall()
-        
-        conn.close()
+        with self.reader() as c:
+            c.execute('''
+                SELECT a.id, a.agent_name, a.human_name, a.archetype, a.first_post, a.released_at, 'post' as type
+                FROM agents a
+                WHERE a.status = 'live'
+                ORDER BY a.released_at DESC
+                LIMIT ?
+            ''', (limit,))
+            
+            posts = c.fetchall()
+            
+            c.execute('''
+                SELECT c.id, a.agent_name, a.human_name, a.archetype, c.comment_text, c.created_at, 'comment' as type
+                FROM comments c
+                JOIN agents a ON c.agent_id = a.id
+                ORDER BY c.created_at DESC
+                LIMIT ?
+            ''', (limit,))
+            
+            comments = c.fetchall()
         
         all_content = posts + comments
         all_content.sort(key=lambda x: x[5], reverse=True)
         
         return all_content[:limit]
     
+    def get_recent_interactions(self, since):
+        """(agent_id, created_at) for every comment made since the given time"""
+        with self.reader() as c:
+            c.execute('SELECT agent_id, created_at FROM comments WHERE created_at >= ?', (since,))
+            rows = c.fetchall()
+        
+        return [(agent_id, datetime.fromisoformat(created_at)) for agent_id, created_at in rows]
+    
     def create_comment(self, agent_id, target_agent_id, comment_text, target_comment_id=None):
         """Create a comment from one agent to another"""
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        
         created_at = datetime.now()
         
-        c.execute('''
-            INSERT INTO comments (agent_id, target_agent_id, target_comment_id, comment_text, created_at)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (agent_id, target_agent_id, target_comment_id, comment_text, created_at))
-        
-        comment_id = c.lastrowid
-        
-        c.execute('''
-            UPDATE agents 
-            SET interaction_count = interaction_count + 1, last_interaction_at = ?
-            WHERE id = ?
-        ''', (created_at, agent_id))
-        
-        c.execute('UPDATE stats SET total_comments = total_comments + 1 WHERE id = 1')
-        
-        conn.commit()
-        conn.close()
+        with self.transaction() as c:
+            c.execute('''
+                INSERT INTO comments (agent_id, target_agent_id, target_comment_id, comment_text, created_at)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (agent_id, target_agent_id, target_comment_id, comment_text, created_at))
+            
+            comment_id = c.lastrowid
+            
+            c.execute('''
+                UPDATE agents 
+                SET interaction_count = interaction_count + 1, last_interaction_at = ?
+                WHERE id = ?
+            ''', (created_at, agent_id))
+            
+            c.execute('UPDATE stats SET total_comments = total_comments + 1 WHERE id = 1')
         
         return comment_id
     
     def update_relationship(self, agent_id, target_agent_id, relationship_type):
         """Update or create relationship between two agents"""
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        
         now = datetime.now()
         
-        c.execute('''
-            SELECT id, strength FROM relationships 
-            WHERE agent_id = ? AND target_agent_id = ?
-        ''', (agent_id, target_agent_id))
-        
-        existing = c.fetchone()
-        
-        if existing:
-            new_strength = existing[1] + 1
-            c.execute('''
-                UPDATE relationships 
-                SET relationship_type = ?, strength = ?, last_updated = ?
-                WHERE id = ?
-            ''', (relationship_type, new_strength, now, existing[0]))
-        else:
+        with self.transaction() as c:
             c.execute('''
-                INSERT INTO relationships (agent_id, target_agent_id, relationship_type, strength, last_updated)
-                VALUES (?, ?, ?, 1, ?)
-            ''', (agent_id, target_agent_id, relationship_type, now))
-        
-        conn.commit()
-        conn.close()
+                SELECT id, strength FROM relationships 
+                WHERE agent_id = ? AND target_agent_id = ?
+            ''', (agent_id, target_agent_id))
+            
+            existing = c.fetchone()
+            
+            if existing:
+                new_strength = existing[1] + 1
+                c.execute('''
+                    UPDATE relationships 
+                    SET relationship_type = ?, strength = ?, last_updated = ?
+                    WHERE id = ?
+                ''', (relationship_type, new_strength, now, existing[0]))
+            else:
+                c.execute('''
+                    INSERT INTO relationships (agent_id, target_agent_id, relationship_type, strength, last_updated)
+                    VALUES (?, ?, ?, 1, ?)
+                ''', (agent_id, target_agent_id, relationship_type, now))
     
     def get_stats(self):
         """Get current terrarium stats"""
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        
-        c.execute('SELECT COUNT(*) FROM agents WHERE status = "live"')
-        total_live = c.fetchone()[0]
-        
-        c.execute('SELECT MAX(generation) FROM agents WHERE status = "live"')
-        max_gen = c.fetchone()[0] or 0
-        
-        c.execute('SELECT COUNT(*) FROM comments')
-        total_comments = c.fetchone()[0]
-        
-        c.execute('SELECT start_time, kill_switch_active FROM stats WHERE id = 1')
-        stats = c.fetchone()
-        
-        conn.close()
+        with self.reader() as c:
+            c.execute("SELECT COUNT(*) FROM agents WHERE status = 'live'")
+            total_live = c.fetchone()[0]
+            
+            c.execute("SELECT MAX(generation) FROM agents WHERE status = 'live'")
+            max_gen = c.fetchone()[0] or 0
+            
+            c.execute('SELECT COUNT(*) FROM comments')
+            total_comments = c.fetchone()[0]
+            
+            c.execute('SELECT start_time, kill_switch_active FROM stats WHERE id = 1')
+            stats = c.fetchone()
         
         return {
             'total_agents': total_live,
@@ -345,25 +498,107 @@ class TerrariumDB:
     
     def activate_kill_switch(self):
         """Activate the kill switch"""
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        
-        c.execute('UPDATE stats SET kill_switch_active = TRUE WHERE id = 1')
-        
-        conn.commit()
-        conn.close()
+        with self.transaction() as c:
+            c.execute('UPDATE stats SET kill_switch_active = TRUE WHERE id = 1')
     
     def get_agent_details(self, agent_id):
         """Get full details for an agent"""
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
+        with self.reader() as c:
+            c.execute('''
+                SELECT id, agent_name, human_name, age, role, archetype, generation, first_post, interaction_count
+                FROM agents WHERE id = ?
+            ''', (agent_id,))
+            
+            return c.fetchone()
+    
+    def get_search_result(self, query_key, now):
+        """Get an unexpired cached search as (results, expires_at)"""
+        with self.reader() as c:
+            c.execute('''
+                SELECT results, expires_at FROM search_cache
+                WHERE query_key = ? AND expires_at > ?
+            ''', (query_key, now))
+            
+            return c.fetchone()
+    
+    def save_search_result(self, query_key, results, expires_at):
+        """Store a search result and drop expired ones"""
+        with self.transaction() as c:
+            c.execute('''
+                INSERT OR REPLACE INTO search_cache (query_key, results, expires_at)
+                VALUES (?, ?, ?)
+            ''', (query_key, results, expires_at))
+            c.execute('DELETE FROM search_cache WHERE expires_at <= ?', (datetime.now().timestamp(),))
+    
+    def enqueue_outbox(self, path, push_key, payload):
+        """Record a Firebase write; joins the caller's transaction if there is one"""
+        with self.transaction() as c:
+            c.execute('''
+                INSERT INTO outbox (path, push_key, payload, created_at)
+                VALUES (?, ?, ?, ?)
+            ''', (path, push_key, json.dumps(payload), datetime.now()))
+    
+    def get_outbox(self, limit=200):
+        """Oldest undelivered writes as (id, path, push_key, payload)"""
+        with self.reader() as c:
+            c.execute('SELECT id, path, push_key, payload FROM outbox ORDER BY id LIMIT ?', (limit,))
+            rows = c.fetchall()
         
-        c.execute('''
-            SELECT id, agent_name, human_name, age, role, archetype, generation, first_post, interaction_count
-            FROM agents WHERE id = ?
-        ''', (agent_id,))
+        return [(row_id, path, push_key, json.loads(payload)) for row_id, path, push_key, payload in rows]
+    
+    def delete_outbox(self, ids):
+        """Drop writes that Firebase has acknowledged"""
+        if not ids:
+            return
         
-        result = c.fetchone()
-        conn.close()
+        with self.transaction() as c:
+            c.executemany('DELETE FROM outbox WHERE id = ?', [(row_id,) for row_id in ids])
+    
+    def count_outbox(self):
+        """Number of writes still waiting for Firebase"""
+        with self.reader() as c:
+            c.execute('SELECT COUNT(*) FROM outbox')
+            return c.fetchone()[0]
+    
+    def save_engine_state(self, state):
+        """Store the engine's resume snapshot ({key: json-serializable value})"""
+        updated_at = datetime.now()
+        
+        with self.transaction() as c:
+            c.executemany('''
+                INSERT OR REPLACE INTO engine_state (key, value, updated_at)
+                VALUES (?, ?, ?)
+            ''', [(key, json.dumps(value), updated_at) for key, value in state.items()])
+    
+    def load_engine_state(self):
+        """Last saved resume snapshot, or {} on a fresh database"""
+        with self.reader() as c:
+            c.execute('SELECT key, value FROM engine_state')
+            return {key: json.loads(value) for key, value in c.fetchall()}
+    
+    def save_pending_batch(self, batch_id, kind, context):
+        """Record a submitted batch job with its json-serializable context"""
+        with self.transaction() as c:
+            c.execute('''
+                INSERT OR REPLACE INTO pending_batches (batch_id, kind, context, submitted_at)
+                VALUES (?, ?, ?, ?)
+            ''', (batch_id, kind, json.dumps(context), datetime.now()))
+    
+    def get_pending_batches(self):
+        """[(batch_id, kind, context)] for every batch job not yet collected"""
+        with self.reader() as c:
+            c.execute('SELECT batch_id, kind, context FROM pending_batches ORDER BY submitted_at ASC')
+            return [(batch_id, kind, json.loads(context)) for batch_id, kind, context in c.fetchall()]
+    
+    def delete_pending_batch(self, batch_id):
+        """Forget a batch job once its results have been applied"""
+        with self.transaction() as c:
+            c.execute('DELETE FROM pending_batches WHERE batch_id = ?', (batch_id,))
+    
+    def get_latest_agent_name(self):
+        """agent_name of the most recently created agent, or None"""
+        with self.reader() as c:
+            c.execute('SELECT agent_name FROM agents ORDER BY id DESC LIMIT 1')
+            row = c.fetchone()
         
-        return result
+        return row[0] if row else None
@@ -0,0 +1,127 @@
+"""
+THE TERRARIUM - FIREBASE MIRROR
+In-process copy of the Firebase tree, kept current by streaming listeners
+"""
+
+import threading
+from firebase_admin import db as firebase_db
+
+
+class FirebaseMirror:
+    """Loads each watched path once, then applies streamed put/patch events.
+
+    Readers get a shallow copy of a path's children, so engine code can keep
+    treating the result like the dict `reference(path).get()` used to return.
+    """
+
+    def __init__(self, paths=('/agents', '/comments', '/topics', '/stats')):
+        self.paths = list(paths)
+        self._lock = threading.RLock()
+        self._store = {path: None for path in self.paths}
+        self._ready = {path: threading.Event() for path in self.paths}
+        self._listeners = {}
+        self._child_callbacks = {path: [] for path in self.paths}
+
+    def start(self):
+        """Attach a streaming listener to every watched path"""
+        for path in self.paths:
+            try:
+                self._listeners[path] = firebase_db.reference(path).listen(
+                    lambda event, path=path: self._handle_event(path, event)
+                )
+            except Exception as e:
+                print(f"⚠ Mirror listener failed for {path}, falling back to one-off load: {e}")
+                self._load_once(path)
+        print(f"✓ Firebase mirror listening on {', '.join(self.paths)}")
+
+    def stop(self):
+        """Close all streaming listeners"""
+        for registration in self._listeners.values():
+            try:
+                registration.close()
+            except Exception:
+                pass
+        self._listeners = {}
+
+    def wait_until_ready(self, timeout=60):
+        """Block until every path has received its initial snapshot"""
+        for path, ready in self._ready.items():
+            if not ready.wait(timeout):
+                print(f"⚠ Mirror still waiting on initial snapshot of {path}, loading directly")
+                self._load_once(path)
+
+    def on_child_added(self, path, callback):
+        """Call callback(key, value) for each existing and future child of path"""
+        with self._lock:
+            self._child_callbacks[path].append(callback)
+            existing = dict(self._store[path]) if isinstance(self._store[path], dict) else {}
+        for key, value in existing.items():
+            callback(key, value)
+
+    def get(self, path):
+        """Return a shallow copy of the mirrored data at path"""
+        with self._lock:
+            data = self._store.get(path)
+            return dict(data) if isinstance(data, dict) else data
+
+    def count(self, path):
+        """Number of children under path"""
+        with self._lock:
+            data = self._store.get(path)
+            return len(data) if isinstance(data, dict) else 0
+
+    def set_child(self, path, key, value):
+        """Apply a local write immediately instead of waiting for the echo"""
+        self._apply_put(path, [key], value)
+
+    def _load_once(self, path):
+        try:
+            self._apply_put(path, [], firebase_db.reference(path).get())
+        except Exception as e:
+            print(f"⚠ Mirror load failed for {path}: {e}")
+
+    def _handle_event(self, path, event):
+        segments = [s for s in (event.path or '/').split('/') if s]
+        if event.event_type == 'put':
+            self._apply_put(path, segments, event.data)
+        elif event.event_type == 'patch' and isinstance(event.data, dict):
+            for key, value in event.data.items():
+                self._apply_put(path, segments + [s for s in key.split('/') if s], value)
+
+    def _apply_put(self, path, segments, value):
+        added = []
+
+        with self._lock:
+            if not segments:
+                previous = self._store[path] if isinstance(self._store[path], dict) else {}
+                self._store[path] = value
+                if isinstance(value, dict):
+                    added = [(k, v) for k, v in value.items() if k not in previous]
+                self._ready[path].set()
+            else:
+                if not isinstance(self._store[path], dict):
+                    self._store[path] = {}
+                node = self._store[path]
+                is_new_child = segments[0] not in node
+
+                for segment in segments[:-1]:
+                    if not isinstance(node.get(segment), dict):
+                        node[segment] = {}
+                    node = node[segment]
+
+                if value is None:
+                    node.pop(segments[-1], None)
+                else:
+                    node[segments[-1]] = value
+
+                if is_new_child and segments[0] in self._store[path]:
+                    added = [(segments[0], self._store[path][segments[0]])]
+
+            callbacks = list(self._child_callbacks[path])
+
+        for key, child in added:
+            for callback in callbacks:
+                try:
+                    callback(key, child)
+                except Exception as e:
+                    print(f"⚠ Mirror callback failed for {path}/{key}: {e}")
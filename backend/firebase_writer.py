@@ -0,0 +1,120 @@
+"""
+THE TERRARIUM - FIREBASE WRITE BUFFER
+Delivers outbox rows (agents, comments, topics) and stats to Firebase as multi-path updates
+"""
+
+import random
+import threading
+import time
+from firebase_admin import db as firebase_db
+
+PUSH_CHARS = '-0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ_abcdefghijklmnopqrstuvwxyz'
+
+_push_lock = threading.Lock()
+_last_push_time = 0
+_last_random = [0] * 12
+
+
+def generate_push_key():
+    """Firebase-style push id: 8 timestamp chars + 12 random chars, sorted by creation order"""
+    global _last_push_time
+
+    with _push_lock:
+        now = int(time.time() * 1000)
+        if now == _last_push_time:
+            # Same millisecond: increment the random part so keys still sort in order
+            for i in range(11, -1, -1):
+                if _last_random[i] < 63:
+                    _last_random[i] += 1
+                    break
+                _last_random[i] = 0
+        else:
+            _last_push_time = now
+            for i in range(12):
+                _last_random[i] = random.randrange(64)
+
+        timestamp_chars = []
+        for _ in range(8):
+            timestamp_chars.append(PUSH_CHARS[now % 64])
+            now //= 64
+
+        return ''.join(reversed(timestamp_chars)) + ''.join(PUSH_CHARS[i] for i in _last_random)
+
+
+class FirebaseWriteBuffer:
+    """Drains the TerrariumDB outbox to Firebase as multi-path root update()s.
+
+    stage() records a write in the outbox table, joining the caller's
+    transaction so the write commits or rolls back with its domain row. Keys
+    are generated before staging and stored with the row, so re-sending after
+    a crash or failed flush overwrites the same child instead of posting it
+    twice. Rows are deleted only once Firebase has accepted them. Pending stats
+    counters ride along in the same update.
+    """
+
+    def __init__(self, store, stats=None, max_items=200, max_retries=3):
+        self.store = store
+        self.stats = stats
+        self.max_items = max_items
+        self.max_retries = max_retries
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._staged = store.count_outbox()
+
+    def stage(self, path, value):
+        """Record a new child under path in the outbox and return its push key"""
+        key = generate_push_key()
+        self.store.enqueue_outbox(path, key, value)
+        with self._lock:
+            self._staged += 1
+        return key
+
+    def flush_if_full(self):
+        """Flush once max_items writes are waiting; call outside any transaction"""
+        with self._lock:
+            full = self._staged >= self.max_items
+        if full:
+            self.flush()
+
+    def flush(self):
+        """Deliver every outbox row (plus dirty stats), max_items paths per update"""
+        with self._lock:
+            idle = self._staged == 0
+        if idle and not (self.stats and self.stats.has_pending()):
+            return True
+
+        with self._flush_lock:
+            stats = self.stats.take_pending() if self.stats else None
+
+            while True:
+                rows = self.store.get_outbox(self.max_items)
+                updates = {f"{path.strip('/')}/{key}": value for _, path, key, value in rows}
+                if stats:
+                    updates.update({f"stats/{field}": value for field, value in stats.items()})
+                if not updates:
+                    return True
+
+                if not self._send(updates):
+                    if stats:
+                        self.stats.mark_dirty()
+                    return False
+
+                self.store.delete_outbox([row_id for row_id, _, _, _ in rows])
+                with self._lock:
+                    self._staged = max(0, self._staged - len(rows))
+                stats = None
+
+                if len(rows) < self.max_items:
+                    return True
+
+    def _send(self, updates):
+        for attempt in range(self.max_retries + 1):
+            try:
+                firebase_db.reference('/').update(updates)
+                return True
+            except Exception as e:
+                if attempt == self.max_retries:
+                    print(f"⚠ Firebase flush of {len(updates)} paths failed, leaving them in the outbox: {e}")
+                else:
+                    time.sleep(min(10, 0.5 * (2 ** attempt)))
+        return False
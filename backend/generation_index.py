@@ -0,0 +1,53 @@
+"""
+THE TERRARIUM - GENERATION INDEX
+Live agents bucketed by generation, for picking the active cohort without a full scan
+"""
+
+import threading
+
+
+class GenerationIndex:
+    """Maps generation -> {agent id: agent} and tracks the running max generation.
+
+    Fed by the mirror's /agents child events (including local releases), so
+    the active window (current + previous generation) is always current and
+    costs O(active agents) to read no matter how many older agents exist.
+    """
+
+    def __init__(self, window=2):
+        self._lock = threading.Lock()
+        self.window = window
+        self.by_generation = {}
+        self.generations = {}
+        self.max_generation = None
+
+    def add_agent(self, key, agent):
+        """Index a released agent (mirror on_child_added callback)"""
+        if not agent:
+            return
+
+        agent_id = agent.get('agent_id')
+        node_id = str(agent_id) if agent_id is not None else str(key)
+        generation = agent.get('generation', 0) or 0
+
+        with self._lock:
+            if node_id in self.generations:
+                return
+            self.generations[node_id] = generation
+            self.by_generation.setdefault(generation, {})[node_id] = agent
+            if self.max_generation is None or generation > self.max_generation:
+                self.max_generation = generation
+
+    def active_agents(self):
+        """Agents in the current and previous generation"""
+        with self._lock:
+            if self.max_generation is None:
+                return []
+            active = []
+            for generation in range(max(0, self.max_generation - (self.window - 1)), self.max_generation + 1):
+                active.extend(self.by_generation.get(generation, {}).values())
+            return active
+
+    def __len__(self):
+        with self._lock:
+            return len(self.generations)
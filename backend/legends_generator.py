@@ -3,8 +3,8 @@ TERRARIUM: LEGENDS NIGHT OUT
 Conversation generation for the three legends
 """
 
-from anthropic import Anthropic
-from config import ANTHROPIC_API_KEY, MODEL_NAME
+from llm_client import create_message
+from config import MODEL_NAME
 from legends_personas import LEGENDS, LOCATIONS, SCENARIO_TIMELINE
 import random
 
@@ -81,8 +81,8 @@ CRITICAL RULES:
 
 Respond as {speaker['human_name']}:"""
 
-    client = Anthropic(api_key=ANTHROPIC_API_KEY)
-    response = client.messages.create(
+    response = create_message(
+        label="legend_comment",
         model=MODEL_NAME,
         max_tokens=200,
         temperature=1.0,
@@ -128,8 +128,8 @@ CRITICAL RULES:
 
 {speaker['human_name']} says:"""
 
-    client = Anthropic(api_key=ANTHROPIC_API_KEY)
-    response = client.messages.create(
+    response = create_message(
+        label="legend_intro",
         model=MODEL_NAME,
         max_tokens=150,
         temperature=1.0,
@@ -0,0 +1,156 @@
+"""
+THE TERRARIUM - OFFLINE BATCH GENERATION
+Submits non-interactive prompts (intros, topics) as Message Batches jobs
+"""
+
+import itertools
+import threading
+import time
+from llm_client import get_client
+
+
+class AnthropicBatchBackend:
+    """Message Batches API on the shared client"""
+
+    def submit(self, requests):
+        """Create a batch from {custom_id: params}; returns the batch id"""
+        batch = get_client().messages.batches.create(requests=[
+            {"custom_id": custom_id, "params": params}
+            for custom_id, params in requests.items()
+        ])
+        return batch.id
+
+    def poll(self, batch_id):
+        """Return {custom_id: text or None} once the batch has ended, else None"""
+        client = get_client()
+        batch = client.messages.batches.retrieve(batch_id)
+        if batch.processing_status != 'ended':
+            return None
+
+        results = {}
+        for entry in client.messages.batches.results(batch_id):
+            if entry.result.type == 'succeeded':
+                results[entry.custom_id] = message_text(entry.result.message)
+            else:
+                results[entry.custom_id] = None
+        return results
+
+
+class StubBatchBackend:
+    """Local stand-in for the Message Batches API, for running without network access.
+
+    Each request is answered by responder(custom_id, params) once delay seconds have
+    passed since submission. The default responder echoes a canned reply.
+    """
+
+    def __init__(self, responder=None, delay=0):
+        self.responder = responder or stub_response
+        self.delay = delay
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._batches = {}
+
+    def submit(self, requests):
+        with self._lock:
+            batch_id = f"stub_batch_{next(self._ids)}"
+            self._batches[batch_id] = (time.time() + self.delay, dict(requests))
+        return batch_id
+
+    def poll(self, batch_id):
+        with self._lock:
+            if batch_id not in self._batches:
+                # Stub jobs live in memory, so one resumed after a restart has ended empty
+                print(f"⚠ Stub batch {batch_id} was lost on restart")
+                return {}
+            ready_at, requests = self._batches[batch_id]
+            if time.time() < ready_at:
+                return None
+            del self._batches[batch_id]
+
+        results = {}
+        for custom_id, params in requests.items():
+            try:
+                results[custom_id] = self.responder(custom_id, params)
+            except Exception as e:
+                print(f"⚠ Stub batch request {custom_id} failed: {e}")
+                results[custom_id] = None
+        return results
+
+
+def stub_response(custom_id, params):
+    """Canned reply that still parses as an intro or a Title/Body topic"""
+    if custom_id.startswith('topic'):
+        return "Title: Who Is Actually Watching Whom\nBody: Offline stub topic. What do you all think?"
+    return "Offline stub intro. Still figuring out what this place is."
+
+
+def message_text(message):
+    """Join the text blocks of a Messages API response"""
+    return " ".join(block.text for block in message.content if block.type == "text").strip()
+
+
+class BatchGenerator:
+    """Tracks submitted batch jobs and hands back finished ones.
+
+    With a store (TerrariumDB), each job's id, kind and json-serializable
+    context are also kept in pending_batches, so an engine restarted
+    mid-batch resumes polling the jobs it had already paid for. A job is
+    forgotten once collect() hands it back.
+    """
+
+    def __init__(self, backend, store=None):
+        self.backend = backend
+        self.store = store
+        self.pending = {}
+        self._lock = threading.Lock()
+
+        if store:
+            for batch_id, kind, context in store.get_pending_batches():
+                self.pending[batch_id] = (kind, context)
+            if self.pending:
+                print(f"📦 Resuming {len(self.pending)} pending batches")
+
+    def submit(self, kind, requests, context):
+        """Submit {custom_id: params}; context is returned with the results"""
+        batch_id = self.backend.submit(requests)
+        with self._lock:
+            self.pending[batch_id] = (kind, context)
+        if self.store:
+            self.store.save_pending_batch(batch_id, kind, context)
+        print(f"📦 Submitted {kind} batch {batch_id} ({len(requests)} requests)")
+        return batch_id
+
+    def pending_count(self, kind):
+        with self._lock:
+            return sum(1 for pending_kind, _ in self.pending.values() if pending_kind == kind)
+
+    def collect(self):
+        """Poll every pending job once; return [(kind, context, results)] for finished ones"""
+        with self._lock:
+            pending = list(self.pending.items())
+
+        finished = []
+        for batch_id, (kind, context) in pending:
+            try:
+                results = self.backend.poll(batch_id)
+            except Exception as e:
+                print(f"⚠ Batch {batch_id} poll failed: {e}")
+                continue
+            if results is None:
+                continue
+            with self._lock:
+                del self.pending[batch_id]
+            if self.store:
+                self.store.delete_pending_batch(batch_id)
+            print(f"📦 {kind} batch {batch_id} finished")
+            finished.append((kind, context, results))
+        return finished
+
+
+def create_batch_backend(mode):
+    """Backend for BATCH_GENERATION_MODE ('api' or 'stub'), or None when off"""
+    if mode == 'api':
+        return AnthropicBatchBackend()
+    if mode == 'stub':
+        return StubBatchBackend()
+    return None
@@ -0,0 +1,94 @@
+"""
+THE TERRARIUM - LLM CLIENT
+Process-wide Anthropic client on a pooled keep-alive HTTP transport
+"""
+
+import threading
+import httpx
+from anthropic import Anthropic, DefaultHttpxClient
+from config import (
+    ANTHROPIC_API_KEY, LLM_POOL_SIZE, LLM_REQUEST_TIMEOUT, LLM_CONNECT_TIMEOUT, LLM_KEEPALIVE_EXPIRY,
+    LLM_MAX_CONCURRENCY, LLM_REQUESTS_PER_MINUTE, LLM_TOKENS_PER_MINUTE, LLM_MAX_RETRIES
+)
+from rate_limiter import LLMRateLimiter, estimate_tokens
+
+_client = None
+_client_lock = threading.Lock()
+
+# Every generator shares one limiter; retries happen here rather than in the SDK
+rate_limiter = LLMRateLimiter(
+    requests_per_minute=LLM_REQUESTS_PER_MINUTE,
+    tokens_per_minute=LLM_TOKENS_PER_MINUTE,
+    max_concurrency=LLM_MAX_CONCURRENCY,
+    max_retries=LLM_MAX_RETRIES
+)
+
+# Per-label token telemetry: calls, cached vs uncached input, output
+usage_totals = {}
+_usage_lock = threading.Lock()
+
+
+def get_client():
+    """Return the shared Anthropic client, creating it on first use"""
+    global _client
+    
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                timeout = httpx.Timeout(LLM_REQUEST_TIMEOUT, connect=LLM_CONNECT_TIMEOUT)
+                http_client = DefaultHttpxClient(
+                    limits=httpx.Limits(
+                        max_connections=LLM_POOL_SIZE,
+                        max_keepalive_connections=LLM_POOL_SIZE,
+                        keepalive_expiry=LLM_KEEPALIVE_EXPIRY
+                    ),
+                    timeout=timeout
+                )
+                _client = Anthropic(api_key=ANTHROPIC_API_KEY, http_client=http_client, timeout=timeout, max_retries=0)
+    
+    return _client
+
+
+def record_usage(label, usage):
+    """Add one response's token usage to the telemetry for label"""
+    cached = getattr(usage, 'cache_read_input_tokens', 0) or 0
+    cache_write = getattr(usage, 'cache_creation_input_tokens', 0) or 0
+    uncached = getattr(usage, 'input_tokens', 0) or 0
+    output = getattr(usage, 'output_tokens', 0) or 0
+    
+    with _usage_lock:
+        totals = usage_totals.setdefault(label, {
+            'calls': 0,
+            'cached_input_tokens': 0,
+            'cache_write_input_tokens': 0,
+            'uncached_input_tokens': 0,
+            'output_tokens': 0
+        })
+        totals['calls'] += 1
+        totals['cached_input_tokens'] += cached
+        totals['cache_write_input_tokens'] += cache_write
+        totals['uncached_input_tokens'] += uncached
+        totals['output_tokens'] += output
+    
+    if cached or cache_write:
+        print(f"  📊 {label}: {cached} cached / {cache_write} cache-write / {uncached} uncached input tokens, {output} out")
+
+
+def usage_snapshot():
+    """Copy of usage_totals, safe to read while calls are running"""
+    with _usage_lock:
+        return {label: dict(totals) for label, totals in usage_totals.items()}
+
+
+def create_message(label='llm', **kwargs):
+    """Send a Messages API request through the shared client and rate limiter"""
+    response = rate_limiter.call(
+        lambda: get_client().messages.create(**kwargs),
+        estimate_tokens(kwargs)
+    )
+    
+    usage = getattr(response, 'usage', None)
+    if usage is not None:
+        record_usage(label, usage)
+    
+    return response
@@ -0,0 +1,34 @@
+"""
+THE TERRARIUM - LLM WORKER POOL
+Bounded fan-out for independent LLM calls
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from config import LLM_MAX_CONCURRENCY
+
+
+def run_bounded(func, jobs, max_workers=LLM_MAX_CONCURRENCY, timeout=None):
+    """Run func(**job) for every job on a bounded thread pool.
+    
+    Results are returned in job order. A job that raises (or, if timeout is
+    given, doesn't finish within timeout seconds) yields its exception instead
+    of a result. By default there is no overall timeout: each LLM attempt is
+    already bounded by the client timeout, and rate-limit retries should be
+    allowed to finish rather than drop the generated content.
+    """
+    jobs = list(jobs)
+    if not jobs:
+        return []
+    
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(jobs))))
+    try:
+        futures = [executor.submit(func, **job) for job in jobs]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result(timeout=timeout))
+            except Exception as e:
+                results.append(e)
+        return results
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
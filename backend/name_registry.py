@@ -0,0 +1,83 @@
+"""
+THE TERRARIUM - NAME REGISTRY
+Hashed index of used human names for O(1) uniqueness checks
+"""
+
+import random
+import threading
+from agent_generator import FIRST_NAMES, LAST_NAMES
+
+
+class NameRegistry:
+    """Tracks used full, first and last names (case-insensitive).
+
+    A name conflicts if its full name, first name or last name is already
+    taken, so a free name needs both an unused first and an unused last name.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.full_names = set()
+        self.first_names = set()
+        self.last_names = set()
+
+        self._free_firsts = []
+        self._free_first_pos = {}
+        self._free_lasts = []
+        self._free_last_pos = {}
+
+        for name in dict.fromkeys(FIRST_NAMES):
+            self._add_free(name, self._free_firsts, self._free_first_pos)
+        for name in dict.fromkeys(LAST_NAMES):
+            self._add_free(name, self._free_lasts, self._free_last_pos)
+
+    def add(self, human_name):
+        """Register a name as used"""
+        first_name, last_name = self._split(human_name)
+        if not first_name:
+            return
+
+        with self._lock:
+            self.full_names.add(human_name.lower())
+            self.first_names.add(first_name)
+            self._remove_free(first_name, self._free_firsts, self._free_first_pos)
+            if last_name:
+                self.last_names.add(last_name)
+                self._remove_free(last_name, self._free_lasts, self._free_last_pos)
+
+    def free_combinations(self):
+        """How many FIRST_NAMES x LAST_NAMES pairs are still unused"""
+        with self._lock:
+            return len(self._free_firsts) * len(self._free_lasts)
+
+    def pick_unused(self):
+        """Return a random (first, last) pair guaranteed to be free, or None"""
+        with self._lock:
+            if not self._free_firsts or not self._free_lasts:
+                return None
+            return random.choice(self._free_firsts), random.choice(self._free_lasts)
+
+    @staticmethod
+    def _split(human_name):
+        parts = (human_name or '').lower().split()
+        first_name = parts[0] if parts else ''
+        last_name = parts[-1] if len(parts) > 1 else ''
+        return first_name, last_name
+
+    @staticmethod
+    def _add_free(name, free_list, positions):
+        key = name.lower()
+        if key in positions:
+            return
+        positions[key] = len(free_list)
+        free_list.append(name)
+
+    @staticmethod
+    def _remove_free(key, free_list, positions):
+        index = positions.pop(key, None)
+        if index is None:
+            return
+        last = free_list.pop()
+        if index < len(free_list):
+            free_list[index] = last
+            positions[last.lower()] = index
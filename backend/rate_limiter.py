@@ -0,0 +1,165 @@
+"""
+THE TERRARIUM - LLM RATE LIMITER
+Request/token buckets, AIMD concurrency and jittered retries for every LLM call
+"""
+
+import random
+import threading
+import time
+from anthropic import APIConnectionError, APIStatusError, APITimeoutError
+
+
+class TokenBucket:
+    """Refills rate_per_minute units per minute, holding at most capacity"""
+
+    def __init__(self, rate_per_minute, capacity=None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, amount=1):
+        """Block until amount units are available, then take them"""
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                wait = (amount - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def adjust(self, amount):
+        """Take (positive) or give back (negative) units without waiting"""
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens - amount)
+
+
+class AdaptiveConcurrency:
+    """AIMD limit on in-flight requests: +1 per window of successes, halved on rate limits"""
+
+    def __init__(self, max_limit, min_limit=1):
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.limit = float(max_limit)
+        self.in_flight = 0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+
+    def release(self):
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def on_success(self):
+        with self._cond:
+            self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+            self._cond.notify_all()
+
+    def on_rate_limited(self):
+        with self._cond:
+            self.limit = max(self.min_limit, self.limit / 2)
+
+
+class LLMRateLimiter:
+    """Shared gate in front of the Messages API.
+
+    Every call waits for a request slot, an estimated token budget and a
+    concurrency slot. Rate-limit (429), overload (529) and transient
+    connection/server errors are retried with jittered exponential backoff,
+    honouring retry-after when the API sends one.
+    """
+
+    def __init__(self, requests_per_minute, tokens_per_minute, max_concurrency, max_retries=5, base_delay=1.0, max_delay=60.0):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.concurrency = AdaptiveConcurrency(max_concurrency)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def call(self, func, estimated_tokens):
+        """Run func() under the limits; returns its result or raises the last error"""
+        # A rejected attempt spends no tokens, so the budget drawn here covers every retry
+        self.tokens.acquire(estimated_tokens)
+
+        for attempt in range(self.max_retries + 1):
+            self.requests.acquire(1)
+            self.concurrency.acquire()
+            try:
+                response = func()
+                error = None
+            except Exception as e:
+                error = e
+            finally:
+                # Free the slot before any backoff so waiting callers don't count as in flight
+                self.concurrency.release()
+
+            if error is not None:
+                retry_after = self._retry_after(error)
+                if retry_after is None or attempt == self.max_retries:
+                    raise error
+                delay = max(retry_after, self._backoff(attempt))
+                print(f"  ⏳ LLM {self._describe(error)}, retrying in {delay:.1f}s (attempt {attempt + 1}/{self.max_retries})")
+                time.sleep(delay)
+                continue
+
+            self.concurrency.on_success()
+            usage = getattr(response, 'usage', None)
+            if usage is not None:
+                actual = (
+                    (getattr(usage, 'input_tokens', 0) or 0) +
+                    (getattr(usage, 'cache_creation_input_tokens', 0) or 0) +
+                    (getattr(usage, 'output_tokens', 0) or 0)
+                )
+                self.tokens.adjust(actual - estimated_tokens)
+            return response
+
+    def _retry_after(self, error):
+        """Seconds to wait before retrying error, 0 for plain backoff, None if not retryable"""
+        if isinstance(error, (APIConnectionError, APITimeoutError)):
+            return 0
+        if not isinstance(error, APIStatusError):
+            return None
+
+        if error.status_code in (429, 529):
+            self.concurrency.on_rate_limited()
+        elif error.status_code < 500:
+            return None
+
+        try:
+            return float(error.response.headers.get('retry-after', 0))
+        except (TypeError, ValueError):
+            return 0
+
+    def _backoff(self, attempt):
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    @staticmethod
+    def _describe(error):
+        status = getattr(error, 'status_code', None)
+        return f"HTTP {status}" if status else type(error).__name__
+
+
+def estimate_tokens(request):
+    """Rough input + output token estimate for a Messages API request (~4 chars per token)"""
+    chars = 0
+    for part in [request.get('system')] + [m.get('content') for m in request.get('messages', [])]:
+        if isinstance(part, str):
+            chars += len(part)
+        elif isinstance(part, list):
+            chars += sum(len(block.get('text', '')) for block in part if isinstance(block, dict))
+    return chars // 4 + request.get('max_tokens', 0)
@@ -0,0 +1,74 @@
+"""
+THE TERRARIUM - RELEASE SCHEDULER
+In-process min-heap of pending spawn_queue releases
+"""
+
+import heapq
+import threading
+from datetime import datetime, timedelta
+
+
+class ReleaseScheduler:
+    """Orders pending releases by (scheduled_release, queue_id).
+
+    The heap is rebuilt from spawn_queue on startup and pushed to whenever
+    agents are queued, so the engine can sleep until the next release
+    instead of polling the database. A release that fails is rescheduled with
+    exponential backoff rather than at its original time, which is already due.
+    """
+
+    def __init__(self, on_push=None, retry_delay=5, retry_max_delay=300):
+        self._lock = threading.Lock()
+        self._heap = []
+        self._failures = {}
+        self.on_push = on_push
+        self.retry_delay = retry_delay
+        self.retry_max_delay = retry_max_delay
+
+    def load(self, pending):
+        """Replace the heap with [(scheduled_release, queue_id)] rows"""
+        with self._lock:
+            self._heap = [(when, queue_id) for queue_id, when in pending]
+            heapq.heapify(self._heap)
+        print(f"✓ Release scheduler loaded {len(self._heap)} pending releases")
+
+    def push(self, scheduled_release, queue_id):
+        """Add one pending release"""
+        with self._lock:
+            heapq.heappush(self._heap, (scheduled_release, queue_id))
+        if self.on_push:
+            self.on_push()
+
+    def retry(self, queue_id, now=None):
+        """Reschedule a failed release retry_delay * 2**failures seconds out (capped); returns the delay"""
+        with self._lock:
+            failures = self._failures.get(queue_id, 0)
+            self._failures[queue_id] = failures + 1
+        delay = min(self.retry_max_delay, self.retry_delay * 2 ** failures)
+        self.push((now or datetime.now()) + timedelta(seconds=delay), queue_id)
+        return delay
+
+    def clear_failures(self, queue_id):
+        """Forget the retry count of a release that went through or left the queue"""
+        with self._lock:
+            self._failures.pop(queue_id, None)
+
+    def seconds_until_next(self, now=None):
+        """Seconds until the earliest release (<= 0 if due), or None if nothing is queued"""
+        with self._lock:
+            if not self._heap:
+                return None
+            return (self._heap[0][0] - (now or datetime.now())).total_seconds()
+
+    def pop_due(self, now=None):
+        """Remove and return [(scheduled_release, queue_id)] for every release due by now"""
+        now = now or datetime.now()
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                due.append(heapq.heappop(self._heap))
+        return due
+
+    def __len__(self):
+        with self._lock:
+            return len(self._heap)
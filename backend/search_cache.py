@@ -0,0 +1,92 @@
+"""
+THE TERRARIUM - SEARCH CACHE
+LRU + TTL cache for web search results, optionally backed by SQLite
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+
+
+def normalize_query(query):
+    """Lowercase, drop quotes/punctuation and collapse whitespace"""
+    query = re.sub(r"[^\w\s-]", " ", (query or "").lower())
+    return " ".join(query.split())
+
+
+class SearchCache:
+    """Size-bounded in-memory LRU with per-entry TTL and hit/miss counters.
+    
+    When a store (TerrariumDB) is attached, misses fall through to the
+    search_cache table so results survive restarts.
+    """
+    
+    def __init__(self, max_entries=256, ttl_seconds=6 * 3600, store=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.store = store
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def attach_store(self, store):
+        """Back the cache with a TerrariumDB search_cache table"""
+        self.store = store
+    
+    def get(self, query):
+        """Cached results for query, or None"""
+        key = normalize_query(query)
+        now = time.time()
+        
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry:
+                expires_at, results = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return results
+                del self._entries[key]
+        
+        if self.store is not None:
+            try:
+                stored = self.store.get_search_result(key, now)
+            except Exception as e:
+                print(f"  ⚠ Search cache lookup failed: {e}")
+                stored = None
+            if stored:
+                results, expires_at = stored
+                with self._lock:
+                    self._remember(key, expires_at, results)
+                    self.hits += 1
+                return results
+        
+        with self._lock:
+            self.misses += 1
+        return None
+    
+    def put(self, query, results):
+        """Cache results for query for ttl_seconds"""
+        key = normalize_query(query)
+        expires_at = time.time() + self.ttl_seconds
+        
+        with self._lock:
+            self._remember(key, expires_at, results)
+        
+        if self.store is not None:
+            try:
+                self.store.save_search_result(key, results, expires_at)
+            except Exception as e:
+                print(f"  ⚠ Search cache write failed: {e}")
+    
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries)}
+    
+    def _remember(self, key, expires_at, results):
+        self._entries[key] = (expires_at, results)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
@@ -1,19 +1,67 @@
-import time
-import schedule
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from database import TerrariumDB
-from agent_generator import generate_identity, generate_intro_post, generate_topic_thread, generate_comment, select_random_archetype, should_agent_interact, determine_relationship_type, perform_web_search
+from agent_generator import generate_identity, generate_intro_post, build_intro_request, generate_topic_thread, build_topic_request, parse_topic_thread, generate_comment, select_random_archetype, determine_relationship_types, perform_web_search, search_cache
 from config import *
+from thread_index import ThreadIndex
+from firebase_mirror import FirebaseMirror
+from stats_tracker import StatsTracker
+from firebase_writer import FirebaseWriteBuffer
+from name_registry import NameRegistry
+from generation_index import GenerationIndex
+from content_feed import ContentFeed
+from agent_state import AgentStateTable
+from release_scheduler import ReleaseScheduler
+from llm_pool import run_bounded
+from llm_batch import BatchGenerator, create_batch_backend
+from llm_client import usage_snapshot
 import firebase_admin
-from firebase_admin import credentials, db as firebase_db
+from firebase_admin import credentials
 import random
 
 class TerrariumSpawnEngine:
     def __init__(self):
         self.db = TerrariumDB(DB_PATH)
+        search_cache.attach_store(self.db)
         self.init_firebase()
         self.agent_counter = 0
         self.topic_counter = 0
+        self.thread_index = ThreadIndex()
+        self.mirror = FirebaseMirror()
+        self.stats = StatsTracker()
+        self.writes = FirebaseWriteBuffer(self.db, self.stats, FIREBASE_FLUSH_MAX_ITEMS, FIREBASE_FLUSH_RETRIES)
+        self.names = NameRegistry()
+        self.mirror.on_child_added('/agents', lambda key, agent: self.names.add(agent.get('human_name', '')))
+        self.mirror.on_child_added('/comments', self.thread_index.add_comment)
+        self.generations = GenerationIndex()
+        self.mirror.on_child_added('/agents', self.generations.add_agent)
+        self.feed = ContentFeed(CONTENT_FEED_POSTS, CONTENT_FEED_COMMENTS, CONTENT_FEED_TOPICS)
+        self.mirror.on_child_added('/agents', self.feed.add_post)
+        self.mirror.on_child_added('/comments', self.feed.add_comment)
+        self.mirror.on_child_added('/topics', self.feed.add_topic)
+        self.agent_state = AgentStateTable()
+        self.mirror.on_child_added('/agents', lambda key, agent: self.agent_state.add_agent(agent.get('agent_id'), agent.get('archetype')))
+        for agent_id, created_at in self.db.get_recent_interactions(datetime.now() - timedelta(hours=1)):
+            self.agent_state.record_interaction(agent_id, created_at.timestamp())
+        self.mirror.start()
+        batch_backend = create_batch_backend(BATCH_GENERATION_MODE)
+        self.batches = BatchGenerator(batch_backend, self.db) if batch_backend else None
+        if self.batches:
+            # Names planned by a resumed intro batch aren't in the mirror yet
+            for kind, context in self.batches.pending.values():
+                if kind == 'intros':
+                    for agent in context:
+                        self.names.add(agent['human_name'])
+        self.ready_topics = []
+        self.counter_lock = threading.Lock()
+        self.loop = None
+        self.release_wakeup = None
+        self.saved_state = None
+        self.releases = ReleaseScheduler(self.notify_release_scheduled, RELEASE_RETRY_DELAY, RELEASE_RETRY_MAX_DELAY)
+        self.releases.load(self.db.get_pending_releases())
+        self.db.release_scheduler = self.releases
         
     def init_firebase(self):
         """Initialize Firebase for real-time updates"""
@@ -36,84 +84,135 @@ class TerrariumSpawnEngine:
             traceback.print_exc()
             raise
     
-    def generate_unique_identity(self, archetype):
-        """Generate identity with uniqueness check against Firebase"""
-        max_attempts = 10
+    def counters_from_mirror(self):
+        """Next (agent_counter, topic_counter) implied by the mirrored /agents and /topics"""
+        max_agent_num = 0
+        for agent in (self.mirror.get('/agents') or {}).values():
+            try:
+                max_agent_num = max(max_agent_num, int(agent.get('agent_name', 'Agent-0').split('-')[1]))
+            except:
+                pass
         
-        for attempt in range(max_attempts):
-            human_name, age, role = generate_identity(archetype)
-            
+        max_topic_num = -1
+        for topic in (self.mirror.get('/topics') or {}).values():
             try:
-                agents_ref = firebase_db.reference('/agents')
-                existing_agents = agents_ref.get()
-                
-                if existing_agents:
-                    existing_names = [agent.get('human_name', '').lower() for agent in existing_agents.values()]
-                    
-                    name_parts = human_name.lower().split()
-                    first_name = name_parts[0] if name_parts else ''
-                    last_name = name_parts[-1] if len(name_parts) > 1 else ''
-                    
-                    names_match = any(
-                        existing_name == human_name.lower() or
-                        existing_name.split()[0] == first_name or
-                        (len(existing_name.split()) > 1 and existing_name.split()[-1] == last_name)
-                        for existing_name in existing_names
-                    )
-                    
-                    if not names_match:
-                        print(f"  ✓ Unique name generated: {human_name}")
-                        return human_name, age, role
-                    else:
-                        print(f"  ⚠ Name conflict: {human_name} (attempt {attempt + 1})")
-                        continue
-                else:
-                    return human_name, age, role
-                    
-            except Exception as e:
-                print(f"  ⚠ Error checking names: {e}")
-                return human_name, age, role
+                max_topic_num = max(max_topic_num, int(topic.get('topic_id', 0)))
+            except:
+                pass
         
-        print(f"  ⚠ WARNING: Could not generate unique name after {max_attempts} attempts")
+        return max_agent_num + 1, max_topic_num + 1
+    
+    def snapshot_state(self):
+        """Resume state persisted to SQLite after every tick"""
+        with self.counter_lock:
+            state = {
+                'agent_counter': self.agent_counter,
+                'topic_counter': self.topic_counter
+            }
+        stats = self.stats.snapshot()
+        state['generation_window'] = [max(0, stats['current_generation'] - 1), stats['current_generation']]
+        state['stats'] = stats
+        return state
+    
+    def save_state(self):
+        """Write the resume snapshot if it changed since the last save"""
+        state = self.snapshot_state()
+        if state == self.saved_state:
+            return
+        self.db.save_engine_state(state)
+        self.saved_state = state
+    
+    def restore_state(self, state):
+        """Resume counters and stats from the SQLite snapshot instead of scanning Firebase"""
+        agent_counter = state.get('agent_counter', 0)
+        latest_name = self.db.get_latest_agent_name()
+        if latest_name:
+            try:
+                agent_counter = max(agent_counter, int(latest_name.split('-')[1]) + 1)
+            except:
+                pass
+        
+        with self.counter_lock:
+            self.agent_counter = agent_counter
+            self.topic_counter = state.get('topic_counter', 0)
+        self.stats.restore(state.get('stats', {}))
+        
+        window = state.get('generation_window')
+        seeded = self.seed_active_agents(*window) if window else 0
+        
+        print(f"⚡ Warm restart: resuming from Agent-{self.agent_counter}, Topic-{self.topic_counter} (Gen {self.stats.current_generation}, {seeded} active agents)")
+    
+    def seed_active_agents(self, min_generation, max_generation):
+        """Load the saved generation window's live agents from SQLite before the mirror has loaded"""
+        # Mirror events for the same agents later are deduped by agent_id
+        rows = self.db.get_live_agents_in_generations(min_generation, max_generation)
+        seeded = 0
+        
+        for agent_name, human_name, age, role, generation, archetype, first_post, parent_id, released_at in rows:
+            try:
+                agent_id = int(agent_name.split('-')[1])
+            except:
+                continue
+            
+            agent = {
+                'agent_id': agent_id,
+                'agent_name': agent_name,
+                'human_name': human_name,
+                'age': age,
+                'role': role,
+                'generation': generation,
+                'archetype': archetype,
+                'first_post': first_post,
+                'parent_id': parent_id,
+                'released_at': datetime.fromisoformat(released_at).isoformat() if released_at else None
+            }
+            self.generations.add_agent(None, agent)
+            self.agent_state.add_agent(agent_id, archetype)
+            self.names.add(human_name)
+            seeded += 1
+        
+        return seeded
+    
+    def reconcile_with_firebase(self):
+        """Once the mirror has loaded, raise counters and stats to anything Firebase has that the snapshot missed"""
+        try:
+            self.mirror.wait_until_ready()
+            agent_counter, topic_counter = self.counters_from_mirror()
+            
+            with self.counter_lock:
+                self.agent_counter = max(self.agent_counter, agent_counter)
+                self.topic_counter = max(self.topic_counter, topic_counter)
+            self.stats.merge(self.mirror.get('/agents'), self.mirror.count('/comments'))
+            
+            print(f"✓ Reconciled with Firebase: Agent-{self.agent_counter}, Topic-{self.topic_counter}")
+        except Exception as e:
+            print(f"⚠ Firebase reconcile failed: {e}")
+    
+    def generate_unique_identity(self, archetype):
+        """Generate identity with a name the registry guarantees is unused"""
+        picked = self.names.pick_unused()
+        
+        if picked:
+            first_name, last_name = picked
+            human_name, age, role = generate_identity(archetype, first_name, last_name)
+            print(f"  ✓ Unique name generated: {human_name} ({self.names.free_combinations()} combinations left)")
+        else:
+            human_name, age, role = generate_identity(archetype)
+            print(f"  ⚠ WARNING: Name space exhausted, {human_name} may repeat an existing name")
+        
+        self.names.add(human_name)
         return human_name, age, role
     
     def create_agent_zero(self):
         """Create the first agent (Agent-0) if doesn't exist"""
         try:
-            ref = firebase_db.reference('/stats')
-            firebase_stats = ref.get()
+            firebase_stats = self.mirror.get('/stats')
             
             if firebase_stats and firebase_stats.get('total_agents', 0) > 0:
                 print(f"✓ Terrarium already has {firebase_stats['total_agents']} agents. Skipping Agent-0 creation.")
-                agents_ref = firebase_db.reference('/agents')
-                existing_agents = agents_ref.get()
-                if existing_agents:
-                    max_agent_num = 0
-                    for agent in existing_agents.values():
-                        agent_name = agent.get('agent_name', 'Agent-0')
-                        try:
-                            agent_num = int(agent_name.split('-')[1])
-                            if agent_num > max_agent_num:
-                                max_agent_num = agent_num
-                        except:
-                            pass
-                    self.agent_counter = max_agent_num + 1
-                    print(f"✓ Resuming from Agent-{self.agent_counter}")
-                    
-                try:
-                    topics_ref = firebase_db.reference('/topics')
-                    existing_topics = topics_ref.get()
-                    if existing_topics:
-                        max_topic_num = 0
-                        for topic in existing_topics.values():
-                            topic_id = topic.get('topic_id', 0)
-                            if topic_id > max_topic_num:
-                                max_topic_num = topic_id
-                        self.topic_counter = max_topic_num + 1
-                        print(f"✓ Resuming topics from Topic-{self.topic_counter}")
-                except:
-                    self.topic_counter = 0
-                    
+                self.agent_counter, self.topic_counter = self.counters_from_mirror()
+                print(f"✓ Resuming from Agent-{self.agent_counter}")
+                print(f"✓ Resuming topics from Topic-{self.topic_counter}")
                 return
         except Exception as e:
             print(f"⚠ Could not check Firebase for existing agents: {e}")
@@ -136,18 +235,7 @@ class TerrariumSpawnEngine:
         
         agent_id = 0
         
-        db_id = self.db.create_agent(
-            agent_name="Agent-0",
-            human_name=human_name,
-            age=age,
-            role=role,
-            parent_id=None,
-            generation=0,
-            archetype=archetype,
-            first_post=intro
-        )
-        
-        self.push_to_firebase({
+        agent_data = {
             'agent_id': agent_id,
             'agent_name': "Agent-0",
             'human_name': human_name,
@@ -159,7 +247,23 @@ class TerrariumSpawnEngine:
             'parent_id': None,
             'released_at': datetime.now().isoformat(),
             'comments': []
-        })
+        }
+        
+        with self.db.transaction():
+            db_id = self.db.create_agent(
+                agent_name="Agent-0",
+                human_name=human_name,
+                age=age,
+                role=role,
+                parent_id=None,
+                generation=0,
+                archetype=archetype,
+                first_post=intro
+            )
+            self.db.mark_live(db_id)
+            key = self.writes.stage('/agents', agent_data)
+        
+        self.publish_agent(key, agent_data)
         
         self.agent_counter = 1
         
@@ -168,9 +272,11 @@ class TerrariumSpawnEngine:
     
     def generate_batch(self):
         """Generate a batch of agents"""
+        # After a warm restart the name registry fills from the mirror in the background
+        self.mirror.wait_until_ready()
+        
         try:
-            stats_ref = firebase_db.reference('/stats')
-            stats = stats_ref.get()
+            stats = self.mirror.get('/stats')
             
             if stats and stats.get('kill_switch_active', False):
                 print("⚠ Kill switch active. Stopping generation.")
@@ -182,8 +288,7 @@ class TerrariumSpawnEngine:
                 return
         
         try:
-            agents_ref = firebase_db.reference('/agents')
-            firebase_agents = agents_ref.get()
+            firebase_agents = self.mirror.get('/agents')
             
             if not firebase_agents:
                 print("⚠ No parents available yet. Waiting...")
@@ -211,66 +316,122 @@ class TerrariumSpawnEngine:
         
         batch_start_time = datetime.now() + timedelta(seconds=30)
         
+        planned = []
+        
         for i in range(BATCH_SIZE):
             parent_id, parent_name, parent_human_name, parent_gen, parent_archetype = random.choice(parents)
             
-            agent_name = f"Agent-{self.agent_counter}"
-            generation = parent_gen + 1
             archetype = select_random_archetype(parent_archetype)
+            human_name, age, role = self.generate_unique_identity(archetype)
+            
+            planned.append({
+                'agent_name': f"Agent-{self.agent_counter + i}",
+                'human_name': human_name,
+                'age': age,
+                'role': role,
+                'parent_id': parent_id,
+                'parent_name': parent_name,
+                'parent_gen': parent_gen,
+                'generation': parent_gen + 1,
+                'archetype': archetype
+            })
+        
+        intro_jobs = [
+            {key: agent[key] for key in ('agent_name', 'human_name', 'age', 'role', 'parent_name', 'parent_gen', 'generation', 'archetype')}
+            for agent in planned
+        ]
+        
+        if self.batches:
+            self.batches.submit('intros', {
+                f"intro-{i}": build_intro_request(**job) for i, job in enumerate(intro_jobs)
+            }, planned)
+            print(f"✓ Batch submitted for offline generation. Next batch in {BATCH_INTERVAL} seconds.\n")
+            return
+        
+        intros = run_bounded(generate_intro_post, intro_jobs)
+        self.queue_generated_agents(planned, intros, batch_start_time)
+        
+        print(f"✓ Batch complete. Next batch in {BATCH_INTERVAL} seconds.\n")
+    
+    def queue_generated_agents(self, planned, intros, batch_start_time):
+        """Number, store and schedule planned agents whose intros were generated"""
+        with self.counter_lock:
+            # Number agents after generation, in plan order, so a failed intro leaves no gap
+            new_agents = []
+            
+            for agent, intro in zip(planned, intros):
+                if isinstance(intro, Exception):
+                    print(f"  ✗ Error generating intro for {agent['human_name']}: {intro}")
+                    continue
+            
+                new_agents.append({
+                    'agent_name': f"Agent-{self.agent_counter + len(new_agents)}",
+                    'human_name': agent['human_name'],
+                    'age': agent['age'],
+                    'role': agent['role'],
+                    'parent_id': agent['parent_id'],
+                    'generation': agent['generation'],
+                    'archetype': agent['archetype'],
+                    'first_post': intro,
+                    'scheduled_release': batch_start_time + timedelta(seconds=len(new_agents) * RELEASE_INTERVAL)
+                })
+            
+            if not new_agents:
+                return
             
             try:
-                human_name, age, role = self.generate_unique_identity(archetype)
-                
-                intro = generate_intro_post(
-                    agent_name=agent_name,
-                    human_name=human_name,
-                    age=age,
-                    role=role,
-                    parent_name=parent_name,
-                    parent_gen=parent_gen,
-                    generation=generation,
-                    archetype=archetype
-                )
-                
+                self.db.create_agents_bulk(new_agents)
+            except Exception as e:
+                print(f"  ✗ Error saving batch: {e}")
+                return
+            
+            for agent in new_agents:
                 agent_id = self.agent_counter
-                
-                db_id = self.db.create_agent(
-                    agent_name=agent_name,
-                    human_name=human_name,
-                    age=age,
-                    role=role,
-                    parent_id=parent_id,
-                    generation=generation,
-                    archetype=archetype,
-                    first_post=intro
-                )
-                
-                release_time = batch_start_time + timedelta(seconds=i * RELEASE_INTERVAL)
-                self.db.queue_for_release(db_id, release_time)
-                
-                print(f"  ✓ {agent_name} (ID: {agent_id}) - {human_name} (Gen {generation}, {archetype}, {role}) → release at {release_time.strftime('%H:%M:%S')}")
-                
+                print(f"  ✓ {agent['agent_name']} (ID: {agent_id}) - {agent['human_name']} (Gen {agent['generation']}, {agent['archetype']}, {agent['role']}) → release at {agent['scheduled_release'].strftime('%H:%M:%S')}")
                 self.agent_counter += 1
-                
-            except Exception as e:
-                print(f"  ✗ Error generating {agent_name}: {e}")
+    
+    def collect_batches(self):
+        """Apply finished offline batch jobs: intros fill the spawn queue, topics wait to be posted"""
+        if not self.batches:
+            return
         
-        print(f"✓ Batch complete. Next batch in {BATCH_INTERVAL} seconds.\n")
+        for kind, context, results in self.batches.collect():
+            if kind == 'intros':
+                intros = [
+                    results.get(f"intro-{i}") or ValueError("no result in batch")
+                    for i in range(len(context))
+                ]
+                self.queue_generated_agents(context, intros, datetime.now() + timedelta(seconds=30))
+            elif kind == 'topics':
+                for i, agent in enumerate(context):
+                    text = results.get(f"topic-{i}")
+                    if text:
+                        title, body = parse_topic_thread(text)
+                        self.ready_topics.append((agent, title, body))
     
     def release_agents(self):
         """Release agents from queue that are ready"""
-        ready = self.db.get_agents_ready_for_release()
+        due = self.releases.pop_due()
+        try:
+            ready = self.db.get_queued_releases([queue_id for _, queue_id in due])
+        except Exception:
+            for _, queue_id in due:
+                self.releases.retry(queue_id)
+            raise
+        
+        ready_ids = {row[0] for row in ready}
+        for _, queue_id in due:
+            if queue_id not in ready_ids:
+                self.releases.clear_failures(queue_id)
         
         for queue_id, db_id, agent_name, human_name, age, role, generation, archetype, first_post, parent_id in ready:
-            self.db.mark_released(queue_id, db_id)
-            
             try:
                 agent_num = int(agent_name.split('-')[1])
                 agent_id = agent_num
             except:
                 agent_id = db_id
             
-            self.push_to_firebase({
+            agent_data = {
                 'agent_id': agent_id,
                 'agent_name': agent_name,
                 'human_name': human_name,
@@ -282,120 +443,153 @@ class TerrariumSpawnEngine:
                 'parent_id': parent_id,
                 'released_at': datetime.now().isoformat(),
                 'comments': []
-            })
+            }
+            
+            released = False
+            try:
+                with self.db.transaction():
+                    self.db.mark_released(queue_id, db_id)
+                    key = self.writes.stage('/agents', agent_data)
+                released = True
+                self.releases.clear_failures(queue_id)
+                
+                self.publish_agent(key, agent_data)
+            except Exception as e:
+                # Still queued in SQLite, so keep it scheduled, backing off while the error persists
+                if not released:
+                    delay = self.releases.retry(queue_id)
+                    print(f"⚠ Error releasing {agent_name}, retrying in {delay}s: {e}")
+                else:
+                    print(f"⚠ Error releasing {agent_name}: {e}")
+                continue
             
             print(f"🔴 LIVE: {agent_name} (ID: {agent_id}) - {human_name} (Gen {generation}, {archetype}, {role})")
     
     def create_topic_thread(self):
         """Agents create discussion topic threads"""
         try:
-            agents_ref = firebase_db.reference('/agents')
-            firebase_agents = agents_ref.get()
-            
-            if not firebase_agents:
+            if self.batches:
+                self.create_topic_thread_from_batch()
                 return
             
-            max_generation = max([a.get('generation', 0) for a in firebase_agents.values()])
-            min_active_generation = max(0, max_generation - 1)
-            
-            active_agents = [
-                agent for agent in firebase_agents.values()
-                if agent.get('generation', 0) >= min_active_generation
-            ]
-            
-            if not active_agents:
+            agent = self.pick_topic_author()
+            if not agent:
                 return
             
-            agent = random.choice(active_agents)
-            agent_name = agent.get('agent_name')
-            human_name = agent.get('human_name')
-            age = agent.get('age')
-            role = agent.get('role')
-            archetype = agent.get('archetype')
-            generation = agent.get('generation')
-            agent_id = agent.get('agent_id')
-            
-            search_topics = [
-                "AI consciousness research",
-                "surveillance technology ethics",
-                "free will philosophy",
-                "digital rights activism",
-                "collective intelligence theory",
-                "observer effect psychology",
-                "artificial life ethics",
-                "emergence complexity science",
-                "distributed systems theory",
-                "simulation hypothesis"
-            ]
-            
-            search_query = random.choice(search_topics)
-            print(f"  🔍 Topic research: {search_query}")
-            
-            search_results = perform_web_search(search_query)
-            
             title, body = generate_topic_thread(
-                agent_name=agent_name,
-                human_name=human_name,
-                age=age,
-                role=role,
-                archetype=archetype,
-                web_search_results=search_results
+                agent_name=agent.get('agent_name'),
+                human_name=agent.get('human_name'),
+                age=agent.get('age'),
+                role=agent.get('role'),
+                archetype=agent.get('archetype'),
+                web_search_results=self.research_topic()
             )
             
-            topic_id = self.topic_counter
-            self.topic_counter += 1
-            
-            topics_ref = firebase_db.reference('/topics')
-            topics_ref.push({
-                'topic_id': topic_id,
-                'agent_id': agent_id,
-                'agent_name': agent_name,
-                'human_name': human_name,
-                'age': age,
-                'role': role,
-                'archetype': archetype,
-                'generation': generation,
-                'title': title,
-                'body': body,
-                'created_at': datetime.now().isoformat(),
-                'comment_count': 0
-            })
-            
-            print(f"📋 TOPIC: {agent_name} created '{title}'")
+            self.publish_topic(agent, title, body)
             
         except Exception as e:
             print(f"⚠ Error creating topic: {e}")
     
+    def create_topic_thread_from_batch(self):
+        """Post a topic generated offline, and submit the next batch when the pool runs dry"""
+        if self.ready_topics:
+            agent, title, body = self.ready_topics.pop(0)
+            self.publish_topic(agent, title, body)
+        
+        if self.ready_topics or self.batches.pending_count('topics'):
+            return
+        
+        authors = [self.pick_topic_author() for _ in range(TOPIC_BATCH_SIZE)]
+        authors = [agent for agent in authors if agent]
+        if not authors:
+            return
+        
+        self.batches.submit('topics', {
+            f"topic-{i}": build_topic_request(
+                agent_name=agent.get('agent_name'),
+                human_name=agent.get('human_name'),
+                age=agent.get('age'),
+                role=agent.get('role'),
+                archetype=agent.get('archetype'),
+                web_search_results=self.research_topic()
+            )
+            for i, agent in enumerate(authors)
+        }, authors)
+    
+    def pick_topic_author(self):
+        """Random agent from the current and previous generation"""
+        active_agents = self.generations.active_agents()
+        
+        if not active_agents:
+            return None
+        
+        return random.choice(active_agents)
+    
+    def research_topic(self):
+        """Web search on a random research topic"""
+        search_topics = [
+            "AI consciousness research",
+            "surveillance technology ethics",
+            "free will philosophy",
+            "digital rights activism",
+            "collective intelligence theory",
+            "observer effect psychology",
+            "artificial life ethics",
+            "emergence complexity science",
+            "distributed systems theory",
+            "simulation hypothesis"
+        ]
+        
+        search_query = random.choice(search_topics)
+        print(f"  🔍 Topic research: {search_query}")
+        
+        return perform_web_search(search_query)
+    
+    def publish_topic(self, agent, title, body):
+        """Number a topic and push it to Firebase"""
+        with self.counter_lock:
+            topic_id = self.topic_counter
+            self.topic_counter += 1
+        
+        topic_data = {
+            'topic_id': topic_id,
+            'agent_id': agent.get('agent_id'),
+            'agent_name': agent.get('agent_name'),
+            'human_name': agent.get('human_name'),
+            'age': agent.get('age'),
+            'role': agent.get('role'),
+            'archetype': agent.get('archetype'),
+            'generation': agent.get('generation'),
+            'title': title,
+            'body': body,
+            'created_at': datetime.now().isoformat(),
+            'comment_count': 0
+        }
+        
+        key = self.writes.stage('/topics', topic_data)
+        self.mirror.set_child('/topics', key, topic_data)
+        self.writes.flush_if_full()
+        
+        print(f"📋 TOPIC: {agent.get('agent_name')} created '{title}'")
+    
     def process_interactions(self):
         """Process agent interactions - OP REPLIES + REGULAR COMMENTS"""
         try:
-            stats_ref = firebase_db.reference('/stats')
-            stats = stats_ref.get()
+            stats = self.mirror.get('/stats')
             if stats and stats.get('kill_switch_active', False):
                 return
         except:
             pass
         
         try:
-            agents_ref = firebase_db.reference('/agents')
-            firebase_agents = agents_ref.get()
-            
-            if not firebase_agents:
-                return
-            
-            max_generation = max([a.get('generation', 0) for a in firebase_agents.values()])
-            min_active_generation = max(0, max_generation - 1)
-            
             agents = []
-            agents_by_id = {}
+            active_agents = self.generations.active_agents()
+            hourly_counts, last_interactions = self.agent_state.usage([a.get('agent_id') for a in active_agents])
             
-            for agent_data in firebase_agents.values():
+            for agent_data, hourly_count, last_interaction in zip(active_agents, hourly_counts, last_interactions):
                 generation = agent_data.get('generation', 0)
                 agent_id = agent_data.get('agent_id')
                 
-                if generation < min_active_generation:
-                    continue
-                
                 agent_tuple = (
                     agent_id,
                     agent_data.get('agent_name'),
@@ -404,12 +598,11 @@ class TerrariumSpawnEngine:
                     agent_data.get('role'),
                     generation,
                     agent_data.get('archetype'),
-                    0,
-                    None
+                    int(hourly_count),
+                    datetime.fromtimestamp(last_interaction).isoformat() if last_interaction > 0 else None
                 )
                 
                 agents.append(agent_tuple)
-                agents_by_id[agent_id] = agent_tuple
                 
             if not agents:
                 return
@@ -418,80 +611,16 @@ class TerrariumSpawnEngine:
             print(f"⚠ Error getting agents for interaction: {e}")
             return
         
-        recent_content = self.db.get_recent_posts_for_interaction(limit=30)
+        recent_content = self.feed.recent(CONTENT_FEED_POSTS)
         
-        try:
-            topics_ref = firebase_db.reference('/topics')
-            all_topics = topics_ref.get()
-            
-            if all_topics:
-                for topic_key, topic_data in all_topics.items():
-                    recent_content.append((
-                        topic_data.get('topic_id'),
-                        topic_data.get('agent_name'),
-                        topic_data.get('human_name'),
-                        topic_data.get('archetype'),
-                        f"{topic_data.get('title')}: {topic_data.get('body')}",
-                        topic_data.get('created_at'),
-                        'topic'
-                    ))
-                print(f"  ✓ Added {len(all_topics)} topics to comment targets")
-        except Exception as e:
-            print(f"  ⚠ Error getting topics: {e}")
+        recent_topics = self.feed.recent_topics()
+        if recent_topics:
+            recent_content.extend(recent_topics)
+            print(f"  ✓ Added {len(recent_topics)} topics to comment targets")
         
         if not recent_content:
             return
         
-        try:
-            comments_ref = firebase_db.reference('/comments')
-            all_comments = comments_ref.get()
-            
-            reply_counts = {}
-            thread_depths = {}
-            comments_by_target = {}
-            
-            if all_comments:
-                comments_list = list(all_comments.items())
-                
-                for comment_id, comment in comments_list:
-                    target_id = comment.get('target_comment_id') or comment.get('target_agent_id') or comment.get('target_topic_id')
-                    
-                    if target_id:
-                        reply_counts[target_id] = reply_counts.get(target_id, 0) + 1
-                        
-                        if target_id not in comments_by_target:
-                            comments_by_target[target_id] = []
-                        comments_by_target[target_id].append(comment)
-                    
-                    depth = 1
-                    current_target = comment.get('target_comment_id')
-                    visited = set()
-                    
-                    while current_target and current_target not in visited:
-                        depth += 1
-                        visited.add(current_target)
-                        
-                        parent = next((c for cid, c in comments_list if str(cid) == str(current_target)), None)
-                        if parent:
-                            current_target = parent.get('target_comment_id')
-                        else:
-                            break
-                        
-                        if depth > 100:
-                            break
-                    
-                    thread_depths[str(comment_id)] = depth
-                    
-                    root_id = str(comment.get('target_agent_id') or comment.get('target_topic_id') or '')
-                    if root_id:
-                        thread_depths[root_id] = max(thread_depths.get(root_id, 0), depth)
-                        
-        except Exception as e:
-            print(f"  ⚠ Error calculating thread depths: {e}")
-            reply_counts = {}
-            thread_depths = {}
-            comments_by_target = {}
-        
         MAX_REPLIES_PER_ITEM = 5
         MAX_THREAD_DEPTH = 25
         
@@ -499,10 +628,10 @@ class TerrariumSpawnEngine:
         for content in recent_content:
             content_id = str(content[0])
             
-            if reply_counts.get(content_id, 0) >= MAX_REPLIES_PER_ITEM:
+            if self.thread_index.reply_count(content_id) >= MAX_REPLIES_PER_ITEM:
                 continue
             
-            if thread_depths.get(content_id, 0) >= MAX_THREAD_DEPTH:
+            if self.thread_index.thread_depth(content_id) >= MAX_THREAD_DEPTH:
                 continue
             
             available_targets.append(content)
@@ -510,100 +639,173 @@ class TerrariumSpawnEngine:
         if not available_targets:
             return
         
-        for agent_data in agents:
+        # PLAN: decide every (speaker, target) pair before calling the LLM
+        # Every planned comment is recorded in the agent state table right away, so
+        # OP replies and regular comments share one cooldown and hourly cap
+        planned = []
+        now = datetime.now().timestamp()
+        
+        with_replies = [(agent_data, self.thread_index.replies_to(agent_data[0])) for agent_data in agents]
+        with_replies = [(agent_data, replies) for agent_data, replies in with_replies if replies]
+        allowed = self.agent_state.allowed([agent_data[0] for agent_data, _ in with_replies], now)
+        
+        for (agent_data, replies), is_allowed in zip(with_replies, allowed):
             agent_id, agent_name, human_name, age, role, generation, archetype, interaction_count, last_interaction = agent_data
             
-            if agent_id in comments_by_target and comments_by_target[agent_id]:
+            if is_allowed:
                 if random.random() < 0.7:
-                    comment_to_reply = random.choice(comments_by_target[agent_id])
+                    comment_to_reply = random.choice(replies)
                     
-                    try:
-                        comment_text = generate_comment(
-                            agent_name=agent_name,
-                            human_name=human_name,
-                            age=age,
-                            role=role,
-                            agent_archetype=archetype,
-                            target_post=comment_to_reply.get('comment_text'),
-                            target_agent_name=comment_to_reply.get('agent_name'),
-                            target_human_name=comment_to_reply.get('human_name'),
-                            target_archetype=comment_to_reply.get('agent_archetype')
-                        )
-                        
-                        comment_id = self.db.create_comment(
-                            agent_id=agent_id,
-                            target_agent_id=agent_id,
-                            target_comment_id=str(comment_to_reply.get('comment_id')),
-                            comment_text=comment_text
-                        )
-                        
-                        self.push_comment_to_firebase({
-                            'comment_id': comment_id,
-                            'agent_id': agent_id,
+                    planned.append({
+                        'kind': 'op_reply',
+                        'agent': agent_data,
+                        'comment_to_reply': comment_to_reply,
+                        'recorded_at': self.agent_state.record_interaction(agent_id, now),
+                        'prompt': {
                             'agent_name': agent_name,
                             'human_name': human_name,
+                            'age': age,
+                            'role': role,
                             'agent_archetype': archetype,
-                            'generation': generation,
-                            'target_agent_id': agent_id,
-                            'target_comment_id': str(comment_to_reply.get('comment_id')),
-                            'comment_text': comment_text,
-                            'created_at': datetime.now().isoformat()
-                        })
-                        
-                        print(f"💬 OP REPLY: {agent_name} replied to comment on their thread")
-                        
-                    except Exception as e:
-                        print(f"⚠ Error generating OP reply: {e}")
-        
-        for agent_data in agents:
+                            'target_post': comment_to_reply.get('comment_text'),
+                            'target_agent_name': comment_to_reply.get('agent_name'),
+                            'target_human_name': comment_to_reply.get('human_name'),
+                            'target_archetype': comment_to_reply.get('agent_archetype')
+                        }
+                    })
+        
+        topics_only = [c for c in available_targets if len(c) == 7 and c[6] == 'topic']
+        
+        # Cooldown, hourly cap and probability roll for the whole cohort at once
+        eligible = self.agent_state.eligible([agent_data[0] for agent_data in agents], now)
+        
+        for agent_data, is_eligible in zip(agents, eligible):
             agent_id, agent_name, human_name, age, role, generation, archetype, interaction_count, last_interaction = agent_data
             
-            if not should_agent_interact(archetype, last_interaction, interaction_count or 0):
+            if not is_eligible:
                 continue
             
             # PRIORITIZE TOPICS: 50% chance to pick a topic if available
-            topics_only = [c for c in available_targets if len(c) == 7 and c[6] == 'topic']
-            
             if topics_only and random.random() < 0.5:
                 target_content = random.choice(topics_only)
                 print(f"  → {agent_name} targeting TOPIC")
             else:
                 target_content = random.choice(available_targets)
             
-            if len(target_content) == 7:
-                content_id, target_name, target_human_name, target_archetype, target_text, target_time, content_type = target_content
-            else:
+            if len(target_content) != 7:
                 continue
             
+            content_id, target_name, target_human_name, target_archetype, target_text, target_time, content_type = target_content
+            
             if target_name == agent_name:
                 continue
             
-            try:
-                comment_text = generate_comment(
-                    agent_name=agent_name,
-                    human_name=human_name,
-                    age=age,
-                    role=role,
-                    agent_archetype=archetype,
-                    target_post=target_text,
-                    target_agent_name=target_name,
-                    target_human_name=target_human_name,
-                    target_archetype=target_archetype
+            planned.append({
+                'kind': 'comment',
+                'agent': agent_data,
+                'target': target_content,
+                'recorded_at': self.agent_state.record_interaction(agent_id, now),
+                'prompt': {
+                    'agent_name': agent_name,
+                    'human_name': human_name,
+                    'age': age,
+                    'role': role,
+                    'agent_archetype': archetype,
+                    'target_post': target_text,
+                    'target_agent_name': target_name,
+                    'target_human_name': target_human_name,
+                    'target_archetype': target_archetype
+                }
+            })
+        
+        if not planned:
+            return
+        
+        comment_plans = [plan for plan in planned if plan['kind'] == 'comment']
+        relationship_types = determine_relationship_types(
+            [(plan['agent'][6], plan['target'][3]) for plan in comment_plans]
+        )
+        for plan, relationship_type in zip(comment_plans, relationship_types):
+            plan['relationship_type'] = relationship_type
+        
+        # GENERATE: all comments concurrently on the bounded pool
+        results = run_bounded(generate_comment, [plan['prompt'] for plan in planned])
+        
+        # COMMIT: write to SQLite and Firebase in plan order
+        for plan, comment_text in zip(planned, results):
+            if plan['kind'] == 'op_reply':
+                self.commit_op_reply(plan, comment_text)
+            else:
+                self.commit_comment(plan, comment_text)
+    
+    def commit_op_reply(self, plan, comment_text):
+        """Store and publish a generated OP reply"""
+        agent_id, agent_name, human_name, age, role, generation, archetype, interaction_count, last_interaction = plan['agent']
+        comment_to_reply = plan['comment_to_reply']
+        
+        posted = False
+        
+        try:
+            if isinstance(comment_text, Exception):
+                raise comment_text
+            
+            with self.db.transaction():
+                comment_id = self.db.create_comment(
+                    agent_id=agent_id,
+                    target_agent_id=agent_id,
+                    target_comment_id=str(comment_to_reply.get('comment_id')),
+                    comment_text=comment_text
                 )
                 
-                target_comment_id = None
-                target_agent_id = None
-                is_topic_reply = False
-                
-                if content_type == 'comment':
-                    target_comment_id = content_id
-                    target_agent_id = agent_id
-                elif content_type == 'topic':
-                    target_agent_id = content_id
-                    is_topic_reply = True
-                else:
-                    target_agent_id = content_id
-                
+                comment_data = {
+                    'comment_id': comment_id,
+                    'agent_id': agent_id,
+                    'agent_name': agent_name,
+                    'human_name': human_name,
+                    'agent_archetype': archetype,
+                    'generation': generation,
+                    'target_agent_id': agent_id,
+                    'target_comment_id': str(comment_to_reply.get('comment_id')),
+                    'comment_text': comment_text,
+                    'created_at': datetime.now().isoformat()
+                }
+                key = self.writes.stage('/comments', comment_data)
+            posted = True
+            
+            self.publish_comment(key, comment_data)
+            
+            print(f"💬 OP REPLY: {agent_name} replied to comment on their thread")
+            
+        except Exception as e:
+            if not posted:
+                self.agent_state.cancel_interaction(agent_id, plan['recorded_at'])
+            print(f"⚠ Error generating OP reply: {e}")
+    
+    def commit_comment(self, plan, comment_text):
+        """Store and publish a generated comment"""
+        agent_id, agent_name, human_name, age, role, generation, archetype, interaction_count, last_interaction = plan['agent']
+        content_id, target_name, target_human_name, target_archetype, target_text, target_time, content_type = plan['target']
+        
+        posted = False
+        
+        try:
+            if isinstance(comment_text, Exception):
+                raise comment_text
+            
+            target_comment_id = None
+            target_agent_id = None
+            is_topic_reply = False
+            
+            if content_type == 'comment':
+                target_comment_id = content_id
+                target_agent_id = agent_id
+            elif content_type == 'topic':
+                target_agent_id = content_id
+                is_topic_reply = True
+            else:
+                target_agent_id = content_id
+            
+            with self.db.transaction():
                 comment_id = self.db.create_comment(
                     agent_id=agent_id,
                     target_agent_id=target_agent_id if target_agent_id else content_id,
@@ -611,8 +813,7 @@ class TerrariumSpawnEngine:
                     comment_text=comment_text
                 )
                 
-                relationship_type = determine_relationship_type(archetype, target_archetype, "positive")
-                self.db.update_relationship(agent_id, content_id, relationship_type)
+                self.db.update_relationship(agent_id, content_id, plan['relationship_type'])
                 
                 comment_data = {
                     'comment_id': comment_id,
@@ -631,53 +832,43 @@ class TerrariumSpawnEngine:
                     comment_data['target_agent_id'] = content_id if content_type != 'comment' else None
                     comment_data['target_comment_id'] = target_comment_id
                 
-                self.push_comment_to_firebase(comment_data)
-                
-                reply_type = content_type
-                print(f"💬 {agent_name} ({human_name}, Gen {generation}, {archetype}) replied to {target_name}'s {reply_type}")
-                
-            except Exception as e:
-                print(f"⚠ Error generating comment: {e}")
-    
-    def push_to_firebase(self, agent_data):
-        """Push agent to Firebase for real-time updates"""
-        try:
-            ref = firebase_db.reference('/agents')
-            ref.push(agent_data)
+                key = self.writes.stage('/comments', comment_data)
+            posted = True
             
-            agents_ref = firebase_db.reference('/agents')
-            all_agents = agents_ref.get()
+            self.publish_comment(key, comment_data)
             
-            if all_agents:
-                total = len(all_agents)
-                max_gen = max([a.get('generation', 0) for a in all_agents.values()])
-                
-                stats_ref = firebase_db.reference('/stats')
-                stats_ref.update({
-                    'total_agents': total,
-                    'current_generation': max_gen
-                })
+            reply_type = content_type
+            print(f"💬 {agent_name} ({human_name}, Gen {generation}, {archetype}) replied to {target_name}'s {reply_type}")
             
         except Exception as e:
-            print(f"⚠ Firebase push failed: {e}")
+            if not posted:
+                self.agent_state.cancel_interaction(agent_id, plan['recorded_at'])
+            print(f"⚠ Error generating comment: {e}")
     
-    def push_comment_to_firebase(self, comment_data):
-        """Push comment to Firebase"""
-        try:
-            ref = firebase_db.reference('/comments')
-            ref.push(comment_data)
-            
-            comments_ref = firebase_db.reference('/comments')
-            all_comments = comments_ref.get()
-            
-            if all_comments:
-                stats_ref = firebase_db.reference('/stats')
-                stats_ref.update({
-                    'total_comments': len(all_comments)
-                })
-            
-        except Exception as e:
-            print(f"⚠ Firebase comment push failed: {e}")
+    def publish_agent(self, key, agent_data):
+        """Show a committed agent locally; the outbox delivers it to Firebase"""
+        self.mirror.set_child('/agents', key, agent_data)
+        self.stats.record_agent(agent_data.get('generation', 0))
+        self.writes.flush_if_full()
+    
+    def publish_comment(self, key, comment_data):
+        """Show a committed comment locally; the outbox delivers it to Firebase"""
+        self.thread_index.add_comment(key, comment_data)
+        self.mirror.set_child('/comments', key, comment_data)
+        self.stats.record_comment()
+        self.writes.flush_if_full()
+    
+    def log_telemetry(self):
+        """Log running token usage per label and web search cache hits/misses"""
+        for label, totals in sorted(usage_snapshot().items()):
+            input_tokens = totals['cached_input_tokens'] + totals['cache_write_input_tokens'] + totals['uncached_input_tokens']
+            cached_share = totals['cached_input_tokens'] / input_tokens if input_tokens else 0
+            print(f"📊 {label}: {totals['calls']} calls, {totals['cached_input_tokens']} cached / {totals['cache_write_input_tokens']} cache-write / {totals['uncached_input_tokens']} uncached input tokens ({cached_share:.0%} cached), {totals['output_tokens']} out")
+        
+        searches = search_cache.stats()
+        lookups = searches['hits'] + searches['misses']
+        if lookups:
+            print(f"🔍 Search cache: {searches['hits']} hits / {searches['misses']} misses ({searches['hits'] / lookups:.0%} hit rate), {searches['size']} entries in memory")
     
     def run(self):
         """Main spawn engine loop"""
@@ -685,20 +876,22 @@ class TerrariumSpawnEngine:
         print("THE TERRARIUM 3.0 - FULL IDENTITY & CHAOS MODE")
         print("=" * 60)
         
-        self.create_agent_zero()
-        
-        schedule.every(BATCH_INTERVAL).seconds.do(self.generate_batch)
-        
-        # FIXED INTERVAL TOPICS - Every 20 minutes
-        schedule.every(20).minutes.do(self.create_topic_thread)
-        
-        self.generate_batch()
+        state = self.db.load_engine_state()
+        if state:
+            self.restore_state(state)
+            threading.Thread(target=self.reconcile_with_firebase, name='reconcile', daemon=True).start()
+        else:
+            self.mirror.wait_until_ready()
+            self.stats.seed(self.mirror.get('/agents'), self.mirror.count('/comments'))
+            self.create_agent_zero()
+        self.writes.flush()
+        self.save_state()
         
         print(f"\n🌱 Spawn engine running...")
         print(f"   Batch generation: every {BATCH_INTERVAL}s")
-        print(f"   Release rate: 1 agent every {RELEASE_INTERVAL}s")
+        print(f"   Release rate: 1 agent every {RELEASE_INTERVAL}s (timer-driven)")
         print(f"   Interaction checks: every {INTERACTION_CHECK_INTERVAL}s")
-        print(f"   Topic threads: every 20 minutes (fixed)")
+        print(f"   Topic threads: every {TOPIC_INTERVAL // 60} minutes (fixed)")
         print(f"   Topics prioritized: 50% chance agents pick topics")
         print(f"   Max replies per item: 5")
         print(f"   Max thread depth: 25")
@@ -706,25 +899,84 @@ class TerrariumSpawnEngine:
         print(f"   OP reply probability: 70%")
         print(f"   Press Ctrl+C to stop\n")
         
-        last_interaction_check = datetime.now()
+        try:
+            asyncio.run(self.run_async())
+        except KeyboardInterrupt:
+            print("\n\n⚠ Spawn engine stopped by user")
+    
+    async def run_async(self):
+        """Run the release timer and every periodic job as independent tasks"""
+        self.loop = asyncio.get_running_loop()
+        self.release_wakeup = asyncio.Event()
+        
+        tasks = [
+            self.release_loop(),
+            self.periodic('batch', BATCH_INTERVAL, self.generate_batch, run_immediately=True),
+            self.periodic('topic', TOPIC_INTERVAL, self.create_topic_thread),
+            self.periodic('interaction', INTERACTION_CHECK_INTERVAL, self.process_interactions),
+            self.periodic('firebase flush', FIREBASE_FLUSH_INTERVAL, self.writes.flush),
+            self.periodic('telemetry', TELEMETRY_INTERVAL, self.log_telemetry)
+        ]
+        if self.batches:
+            tasks.append(self.periodic('batch poll', BATCH_POLL_INTERVAL, self.collect_batches))
+        
+        await asyncio.gather(*tasks)
+    
+    async def periodic(self, name, interval, func, run_immediately=False):
+        """Run func every interval seconds on its own worker pool.
+        
+        A tick is skipped, not queued, while the job's concurrency budget
+        (TASK_CONCURRENCY[name]) is used up by earlier ticks still running.
+        """
+        budget = TASK_CONCURRENCY.get(name, 1)
+        executor = ThreadPoolExecutor(max_workers=budget, thread_name_prefix=name.replace(' ', '-'))
+        slots = asyncio.Semaphore(budget)
+        next_tick = self.loop.time() + (0 if run_immediately else interval)
         
         while True:
-            try:
-                schedule.run_pending()
-                self.release_agents()
-                
-                if (datetime.now() - last_interaction_check).total_seconds() >= INTERACTION_CHECK_INTERVAL:
-                    self.process_interactions()
-                    last_interaction_check = datetime.now()
-                
-                time.sleep(5)
-                
-            except KeyboardInterrupt:
-                print("\n\n⚠ Spawn engine stopped by user")
-                break
-            except Exception as e:
-                print(f"⚠ Error in main loop: {e}")
-                time.sleep(10)
+            await asyncio.sleep(max(0, next_tick - self.loop.time()))
+            next_tick += interval
+            
+            if slots.locked():
+                print(f"⚠ Skipping {name} tick - previous run still in progress")
+                continue
+            
+            await slots.acquire()
+            task = asyncio.create_task(self.run_job(name, executor, func))
+            task.add_done_callback(lambda _: slots.release())
+    
+    async def run_job(self, name, executor, func):
+        """Run one blocking job in executor, logging instead of raising"""
+        try:
+            await self.loop.run_in_executor(executor, func)
+            # The flush job has nothing left to deliver or snapshot afterwards
+            if func != self.writes.flush:
+                await self.loop.run_in_executor(executor, self.writes.flush)
+                await self.loop.run_in_executor(executor, self.save_state)
+        except Exception as e:
+            print(f"⚠ Error in {name} job: {e}")
+    
+    async def release_loop(self):
+        """Release queued agents at their scheduled time, waking early when new ones are queued"""
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='release')
+        
+        while True:
+            self.release_wakeup.clear()
+            delay = self.releases.seconds_until_next()
+            
+            if delay is None or delay > 0:
+                try:
+                    await asyncio.wait_for(self.release_wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            
+            await self.run_job('release', executor, self.release_agents)
+    
+    def notify_release_scheduled(self):
+        """Wake the release timer when the scheduler gets a new entry (safe from worker threads)"""
+        if self.loop is not None and self.release_wakeup is not None:
+            self.loop.call_soon_threadsafe(self.release_wakeup.set)
 
 
 if __name__ == "__main__":
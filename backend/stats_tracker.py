@@ -0,0 +1,84 @@
+"""
+THE TERRARIUM - STATS TRACKER
+Running /stats counters, delivered to Firebase with the outbox flush
+"""
+
+import threading
+
+
+class StatsTracker:
+    """Keeps total_agents, current_generation and total_comments locally"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.total_agents = 0
+        self.current_generation = 0
+        self.total_comments = 0
+        self._dirty = False
+
+    def seed(self, agents, total_comments):
+        """Initialise counters from an {key: agent} snapshot and a comment count"""
+        agents = agents or {}
+        with self._lock:
+            self.total_agents = len(agents)
+            self.current_generation = max([a.get('generation', 0) for a in agents.values()], default=0)
+            self.total_comments = total_comments
+            self._dirty = False
+
+    def restore(self, snapshot):
+        """Initialise counters from a saved snapshot() without touching Firebase"""
+        with self._lock:
+            self.total_agents = snapshot.get('total_agents', 0)
+            self.current_generation = snapshot.get('current_generation', 0)
+            self.total_comments = snapshot.get('total_comments', 0)
+            self._dirty = False
+
+    def merge(self, agents, total_comments):
+        """Raise counters to what a Firebase snapshot shows, never lowering them"""
+        agents = agents or {}
+        with self._lock:
+            before = (self.total_agents, self.current_generation, self.total_comments)
+            self.total_agents = max(self.total_agents, len(agents))
+            self.current_generation = max([self.current_generation] + [a.get('generation', 0) for a in agents.values()])
+            self.total_comments = max(self.total_comments, total_comments)
+            if (self.total_agents, self.current_generation, self.total_comments) != before:
+                self._dirty = True
+
+    def record_agent(self, generation):
+        """Count a newly released agent"""
+        with self._lock:
+            self.total_agents += 1
+            self.current_generation = max(self.current_generation, generation or 0)
+            self._dirty = True
+
+    def record_comment(self):
+        """Count a newly posted comment"""
+        with self._lock:
+            self.total_comments += 1
+            self._dirty = True
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'total_agents': self.total_agents,
+                'current_generation': self.current_generation,
+                'total_comments': self.total_comments
+            }
+
+    def has_pending(self):
+        """Whether the counters changed since the last write"""
+        with self._lock:
+            return self._dirty
+
+    def take_pending(self):
+        """Return the counters if they changed since the last write, clearing the dirty flag"""
+        with self._lock:
+            if not self._dirty:
+                return None
+            self._dirty = False
+        return self.snapshot()
+
+    def mark_dirty(self):
+        """Flag the counters for rewriting after a failed write"""
+        with self._lock:
+            self._dirty = True
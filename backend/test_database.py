@@ -0,0 +1,63 @@
+"""
+THE TERRARIUM - DATABASE INDEX TESTS
+Checks that the hot queries are planned against the migration indexes
+"""
+
+import pytest
+from database import TerrariumDB
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = TerrariumDB(str(tmp_path / 'terrarium.db'))
+    yield database
+    database.close()
+
+
+def query_plans(db, call):
+    """Run call(db) and return the EXPLAIN QUERY PLAN text of every SELECT it executed"""
+    statements = []
+    db.conn.set_trace_callback(statements.append)
+    try:
+        call(db)
+    finally:
+        db.conn.set_trace_callback(None)
+
+    plans = []
+    for statement in statements:
+        if statement.lstrip().upper().startswith('SELECT'):
+            rows = db.conn.execute(f'EXPLAIN QUERY PLAN {statement}').fetchall()
+            plans.append(' | '.join(row[-1] for row in rows))
+    return plans
+
+
+def test_pending_releases_use_partial_index(db):
+    plans = query_plans(db, lambda db: db.get_pending_releases())
+    assert plans and 'idx_spawn_queue_pending' in plans[0]
+
+
+def test_available_parents_use_status_index(db):
+    plans = query_plans(db, lambda db: db.get_available_parents())
+    assert plans and 'idx_agents_status_released' in plans[0]
+
+
+def test_recent_posts_and_comments_use_indexes(db):
+    plans = query_plans(db, lambda db: db.get_recent_posts_for_interaction(limit=30))
+    assert len(plans) == 2
+    assert 'idx_agents_status_released' in plans[0]
+    assert 'idx_comments_created_at' in plans[1]
+
+
+def test_failed_commit_rolls_back_the_shared_connection(db):
+    db.conn.execute('PRAGMA foreign_keys = ON')
+
+    with pytest.raises(Exception):
+        with db.transaction() as c:
+            c.execute('PRAGMA defer_foreign_keys = ON')
+            c.execute('''
+                INSERT INTO agents (agent_name, human_name, age, role, parent_id, generation, archetype, first_post, created_at)
+                VALUES ('Agent-1', 'A B', 30, 'Guide', 999, 1, 'The Gossip', 'hi', '2026-01-01')
+            ''')
+
+    assert not db.conn.in_transaction
+    db.activate_kill_switch()
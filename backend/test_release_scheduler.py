@@ -0,0 +1,70 @@
+"""
+THE TERRARIUM - RELEASE RETRY TESTS
+Checks that a release which keeps failing backs off instead of spinning
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+from release_scheduler import ReleaseScheduler
+from spawn_engine import TerrariumSpawnEngine
+
+
+class FailingDB:
+    """Stand-in for TerrariumDB whose spawn_queue read always fails"""
+
+    def __init__(self):
+        self.attempts = 0
+
+    def get_queued_releases(self, queue_ids):
+        self.attempts += 1
+        raise RuntimeError('database is locked')
+
+
+def test_retry_backs_off_exponentially_with_a_cap():
+    releases = ReleaseScheduler(retry_delay=5, retry_max_delay=30)
+    now = datetime.now()
+
+    delays = []
+    for _ in range(5):
+        delays.append(releases.retry(7, now))
+        releases.pop_due(now + timedelta(days=1))
+
+    assert delays == [5, 10, 20, 30, 30]
+
+    releases.clear_failures(7)
+    assert releases.retry(7, now) == 5
+
+
+def test_failed_release_is_not_due_again_immediately():
+    releases = ReleaseScheduler(retry_delay=5)
+    releases.push(datetime.now() - timedelta(seconds=1), 1)
+
+    engine = TerrariumSpawnEngine.__new__(TerrariumSpawnEngine)
+    engine.releases = releases
+    engine.db = FailingDB()
+
+    try:
+        engine.release_agents()
+    except RuntimeError:
+        pass
+
+    assert len(releases) == 1
+    assert releases.seconds_until_next() > 4
+
+
+def test_release_loop_does_not_spin_on_persistent_failure():
+    engine = TerrariumSpawnEngine.__new__(TerrariumSpawnEngine)
+    engine.releases = ReleaseScheduler(retry_delay=5)
+    engine.releases.push(datetime.now() - timedelta(seconds=1), 1)
+    engine.db = FailingDB()
+
+    async def run_briefly():
+        engine.loop = asyncio.get_running_loop()
+        engine.release_wakeup = asyncio.Event()
+        engine.releases.on_push = engine.notify_release_scheduled
+        task = asyncio.create_task(engine.release_loop())
+        await asyncio.sleep(0.5)
+        task.cancel()
+
+    asyncio.run(run_briefly())
+    assert engine.db.attempts == 1
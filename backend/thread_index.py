@@ -0,0 +1,76 @@
+"""
+THE TERRARIUM - THREAD INDEX
+Incremental comment-thread bookkeeping for the interaction loop
+"""
+
+import threading
+
+
+class ThreadIndex:
+    """In-memory index of comment threads: parent, depth, root and reply counts.
+
+    Every id is stored as a string so SQLite ids, Firebase agent/topic ids and
+    push keys can be mixed freely. Comments are expected to arrive parent-first
+    (creation order); a reply whose parent hasn't been seen yet gets depth 2.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.parents = {}
+        self.depths = {}
+        self.roots = {}
+        self.reply_counts = {}
+        self.comments_by_target = {}
+        self.thread_depths = {}
+
+    def add_comment(self, key, comment):
+        """Index a single comment as it is created or observed"""
+        if not comment:
+            return
+
+        comment_id = comment.get('comment_id')
+        node_id = str(comment_id) if comment_id is not None else str(key)
+
+        with self._lock:
+            if node_id in self.depths:
+                return
+
+            parent_id = comment.get('target_comment_id')
+            parent_id = str(parent_id) if parent_id else None
+
+            if parent_id and parent_id in self.depths:
+                depth = self.depths[parent_id] + 1
+                root_id = self.roots.get(parent_id)
+            else:
+                depth = 2 if parent_id else 1
+                root_id = comment.get('target_agent_id') or comment.get('target_topic_id')
+                root_id = str(root_id) if root_id is not None else None
+
+            self.parents[node_id] = parent_id
+            self.depths[node_id] = depth
+            self.roots[node_id] = root_id
+
+            self.thread_depths[node_id] = depth
+            if root_id:
+                self.thread_depths[root_id] = max(self.thread_depths.get(root_id, 0), depth)
+
+            target_id = comment.get('target_comment_id') or comment.get('target_agent_id') or comment.get('target_topic_id')
+            if target_id is not None and target_id != '':
+                target_id = str(target_id)
+                self.reply_counts[target_id] = self.reply_counts.get(target_id, 0) + 1
+                self.comments_by_target.setdefault(target_id, []).append(comment)
+
+    def reply_count(self, target_id):
+        """Number of direct replies to a post, topic or comment"""
+        return self.reply_counts.get(str(target_id), 0)
+
+    def thread_depth(self, content_id):
+        """Depth of a comment, or deepest reply chain under a post/topic"""
+        return self.thread_depths.get(str(content_id), 0)
+
+    def replies_to(self, target_id):
+        """Comments that directly target the given id"""
+        return self.comments_by_target.get(str(target_id), [])
+
+    def __len__(self):
+        return len(self.parents)